@@ -7,66 +7,113 @@ root_folder : str
     The main folder containing the application. All commands must be executed from this location
     without exceptions.
 """
+import hashlib
+import json
 import os
+import queue
+import re
+import signal
 import subprocess
-
+import threading
+import time
+
+from collections import OrderedDict
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from runpy import run_path
 
+from . import check_cache
+from . import config_files
+from . import error_records
+from . import native_backends
+from . import package_registry
+from . import transports
 from .python_utils import cmd_utils
 from .python_utils import exceptions
 from .python_utils import file_utils
-from .python_utils import json_schema_utils
-from .python_utils import prompts
 from .python_utils.ansi_colors import Ansi
-from .python_utils.tqdm import tqdm
 from .schemas import interface_schema
 from .schemas import packages_schema
 
-root_folder = os.path.realpath(os.path.abspath(os.path.join(
-    os.path.normpath(os.getcwd()))))
+root_folder = config_files.root_folder
 
-_paths_map = {
-    "packages_lists": os.path.join(root_folder, "UserData", "packages_lists"),
-    "interfaces": os.path.join(root_folder, "UserData", "interfaces")
-}
+_paths_map = config_files.paths_map
 
-_summary = """**Summary:**
+_summary = """**Summary{host}:**
 Of the {pkgs_list} packages that you are trying to remove.
 
-{non_existent}{existent}{not_installed}{installed}
+{non_existent}{existent}{not_installed}{installed}{timed_out}{failed}
 - {errors} errors were raised trying to gather the displayed information.
 
-{pkgs_to_handle} packages were chosen to be removed.
+{pkgs_to_handle} packages were chosen to be removed.{pkgs_per_interface}
 
 More details can be found on the log file:
 {log_file}
 """
 
+_packages_list_extensions = config_files.packages_list_extensions
+
+# Exit statuses of the install/remove command that mean that the user aborted it. The command is
+# never run again after them. 130 is the exit status of a shell interrupted with Ctrl+C.
+_default_abort_status = [130, -signal.SIGINT]
+
+# Maximum amount of chunks of checked packages waiting to be installed/removed.
+_stream_queue_size = 64
+_stream_default_chunk_size = 100
+# Seconds to wait for more checked packages before running an incomplete chunk.
+_stream_linger = 2.0
+
+_output_parsers = {
+    # The first white space separated field of each line is a package name.
+    # E.g. pacman -Q, rpm -q --qf "%{NAME}\n", dpkg-query -W
+    "first_word": r"(?P<pkg>\S+)",
+    # Each line is a package name.
+    # E.g. dpkg-query -W -f '${Package}\n'
+    "line": r"(?P<pkg>.+?)\s*$"
+}
+_batch_default_chunk_size = 500
+# Exit statuses of a batch check command that aren't a failure, besides 0. Most commands exit with
+# 1 when any of the packages passed to them didn't pass the check (e.g. dpkg-query -W).
+_batch_default_negative_status = [1]
+_txt_interface_re = re.compile(r"\s*interface:\s*(\S+)\s*$")
+_retry_default_delay = 1.0
+# Seconds to wait for a killed process to exit. Processes stuck in an uninterruptible state
+# (e.g. on a dead NFS mount) are abandoned.
+_kill_grace = 5.0
+# Separator between an interface name and a package name in a packages list entry.
+_interface_tag_sep = "::"
+# Replaced in interface definitions by the root directory of the target system.
+_root_placeholder = "{root}"
+_default_max_hosts = 4
+# Interface definitions and packages lists already loaded by this process, keyed by file path.
+# Reused while the files don't change. Only relevant for long-lived processes (a server).
+_loaded_interfaces = {}
+_loaded_packages_lists = {}
+
 
 class PackageManager():
     """Package manager class.
 
     Attributes
     ----------
-    errors : list
+    errors : error_records.ErrorLog
         Errors storage.
-    existent_pkgs : list
-        Storage for packages that exist in the software sources.
-    installed_pkgs : list
-        Storage for packages that are installed in the system.
     interface : dict
         The commands definitions to manages packages.
     logger : LogSystem
         The logger.
-    non_existent_pkgs : list
-        Storage for packages that DOES NOT exist in the software sources.
-    not_installed_pkgs : list
-        Storage for packages that ARE NOT installed in the system.
-    packages : list
-        The list of packages that hasn't been checked yet.
-    pkgs_to_handle : list
-        List of packages that will be actually processed depending on an action
-        (``install`` or ``remove``).
+    name : str
+        The interface name followed by the root directory of the target system (if any).
+    registry : package_registry.PackageRegistry
+        Storage for all packages and their check results.
+    root : str, None
+        The root directory of the target system. ``None`` for the running system.
+    target : dict
+        The host, interface and root directory handled by this manager. Used by the reports.
+    transport : transports.LocalTransport
+        The transport used to execute the interface commands.
     """
     _actions = [
         "exists",
@@ -74,83 +121,208 @@ class PackageManager():
         "install",
         "remove",
     ]
-
-    def __init__(self, interface="", pkgs_list_relative=[], pkgs_list_absolute=[],
-                 ignore_exists_check=False, ignore_installed_check=False, logger=None):
+    _list_actions = {
+        "exists": "list_available",
+        "installed": "list_installed"
+    }
+
+    def __init__(self, interface="", pkgs_lists=[], ignore_exists_check=False,
+                 ignore_installed_check=False, jobs=1, use_cache=True, refresh_cache=False,
+                 stream=False, resume=False, progress_position=None, root=None, definition=None,
+                 transport=None, reporter=None, cache_store=None, listed_store=None,
+                 final_action_lock=None, logger=None):
         """
         Parameters
         ----------
-        interface : dict
-            The commands definitions to manages packages.
-        pkgs_list_relative : list, optional
-            List of names of file that can be found inside **UserData/packages_lists**.
-        pkgs_list_absolute : list, optional
-            List of absolute paths to files containing a packages list.
+        interface : str
+            File name (no extension) of an interface file in **UserData/interfaces**.
+        pkgs_lists : list, optional
+            List of tuples containing the path to a packages list file and the packages from
+            that file that will be handled by this interface. See :any:`load_packages_lists`.
+        ignore_exists_check : bool, optional
+            Ignore the check for package existence.
+        ignore_installed_check : bool, optional
+            Ignore the check for package installed state.
+        jobs : int, optional
+            Maximum number of package checks to run concurrently.
+        use_cache : bool, optional
+            Use the stored check results if the interface defines a ``cache``.
+        refresh_cache : bool, optional
+            Ignore the stored check results and store new ones.
+        stream : bool, optional
+            Install/remove packages while they are being checked, without asking for confirmation.
+        resume : bool, optional
+            Reuse the check results recorded by an interrupted run.
+        progress_position : int, None, optional
+            Line on which to display the checks progress bar. Used when the checks of several
+            interfaces run at the same time.
+        root : str, None, optional
+            Root directory of the target system (e.g. a chroot or a container image). It replaces
+            the ``{root}`` placeholder in the interface definition. ``/`` is used if not set.
+        definition : dict, None, optional
+            The already loaded interface definition (see :any:`load_interface`). Used to load
+            an interface file only once when handling several target systems.
+        transport : transports.LocalTransport, None, optional
+            The transport used to execute the interface commands. If not set, the commands are
+            executed on the running system.
+        reporter : reports.Reporter, None, optional
+            Where to report each package check result as soon as it is known.
+        cache_store : dict, None, optional
+            Check results storages kept in memory between runs, keyed by interface and target
+            system. The storage of this manager is taken from it (or added to it) instead of
+            being loaded from disk. Used by :any:`server.PlanServer`.
+        listed_store : dict, None, optional
+            Native backends and packages listed by the list commands kept in memory between runs,
+            keyed by interface and target system. They are reused while the package databases
+            don't change. Used by :any:`server.PlanServer`.
+        final_action_lock : threading.Lock, None, optional
+            Held while the install/remove command runs in stream mode. Shared by the managers of
+            the same host so their package managers don't fight over their databases locks.
         logger : LogSystem
             The logger.
+
+        Raises
+        ------
+        exceptions.InvalidArgument
+            If a root directory is set and the interface doesn't use it.
         """
         super().__init__()
         self._ignore_exists_check = ignore_exists_check
         self._ignore_installed_check = ignore_installed_check
+        self._jobs = max(1, jobs)
+        self._stream = stream
+        self._resume = resume
+        self._interface_name = interface
+        self._progress_position = progress_position
+        self.root = root
+        self.transport = transport or transports.LocalTransport()
+        self.name = interface if root is None else "%s (%s)" % (interface, root)
+        # Used to name the files storing data of this interface and target system.
+        self._storage_name = interface if root is None else "%s@%s" % (
+            interface, hashlib.md5(root.encode("utf-8")).hexdigest())
+
+        if self.transport.host is not None:
+            self.name += " on %s" % self.transport.host
+            self._storage_name += "@" + hashlib.md5(
+                self.transport.host.encode("utf-8")).hexdigest()
+
+        self.target = {
+            "host": self.transport.host,
+            "interface": interface,
+            "root": root
+        }
+        self._reporter = reporter
+        self._check_stats = {}
+        self._check_wall_time = 0.0
+        self._journal = None
         self.logger = logger
 
-        self.packages = []
+        self.registry = package_registry.PackageRegistry()
         self.interface = None
-        self.errors = []
-        self.non_existent_pkgs = []
-        self.existent_pkgs = []
-        self.not_installed_pkgs = []
-        self.installed_pkgs = []
+        self.errors = error_records.ErrorLog()
 
-        interface_path = os.path.join(root_folder,
-                                      "UserData",
-                                      "interfaces",
-                                      interface + ".py")
-        self.interface = run_path(interface_path)["interface"]
+        if definition is None:
+            definition = load_interface(interface, self.logger)
 
-        self._validate(self.interface, interface_schema, interface_path, "interface")
+        if root is not None and _root_placeholder not in json.dumps(definition):
+            raise exceptions.InvalidArgument(
+                "The <%s> interface doesn't use the %s placeholder. It can't handle packages of "
+                "a system other than the running one." % (interface, _root_placeholder))
 
-        for pkgs_list in pkgs_list_relative:
-            try:
-                pkgs_path = os.path.join(
-                    root_folder,
-                    "UserData",
-                    "packages_lists",
-                    pkgs_list + ".py")
-                pkgs_list = run_path(pkgs_path)["packages"]
-                self._validate(pkgs_list, packages_schema, pkgs_path, "packages")
-
-                self.packages.extend(pkgs_list)
-            except Exception as err:
-                self.errors.append(str(err))
-                continue
+        # A substituted copy. The commands definitions are modified later.
+        self.interface = _substitute_root(definition, root or "/")
 
-        for pkgs_list in pkgs_list_absolute:
-            try:
-                pkgs_path = os.path.abspath(file_utils.expand_path(pkgs_list))
-                pkgs_list = run_path(pkgs_path)["packages"]
-                self._validate(pkgs_list, packages_schema, pkgs_path, "packages")
+        self._cache = None
 
-                self.packages.extend(pkgs_list)
-            except Exception as err:
-                self.errors.append(str(err))
-                continue
+        if use_cache and "cache" in self.interface:
+            fingerprint_paths = self.interface["cache"].get("fingerprint_paths", [])
+            ttl = self.interface["cache"].get("ttl", check_cache.default_ttl)
+            self._cache = (cache_store or {}).get(self._storage_name)
 
-        # De-duplicate packages.
-        self.packages = list(set(self.packages))
+            if self._cache is not None and not refresh_cache and \
+                    self._cache.fingerprint_paths == fingerprint_paths and self._cache.ttl == ttl:
+                # The package databases might have changed since the last run.
+                self._cache.refresh_fingerprint()
+            else:
+                self._cache = check_cache.CheckCache(
+                    _paths_map["cache"], self._storage_name,
+                    fingerprint_paths=fingerprint_paths,
+                    ttl=ttl,
+                    refresh=refresh_cache)
+
+                if cache_store is not None:
+                    cache_store[self._storage_name] = self._cache
+
+        for pkgs_path, pkgs_list in pkgs_lists:
+            # Duplicated packages are ignored by the registry.
+            self.registry.extend(pkgs_list, pkgs_path)
+
+        self._batch = {}
+        self._timeouts = {}
+        self._listed_pkgs = {}
+        self._listed_store = {} if listed_store is None else \
+            listed_store.setdefault(self._storage_name, {})
+        self._check_procs = set()
+        self._check_procs_lock = threading.Lock()
+        self._final_action_lock = final_action_lock or threading.Lock()
+        self._checks_canceled = False
 
         for a in self._actions:
             self._set_command(a)
+            self._set_batch(a)
+            self._set_timeout(a)
+
+        for a in list(self._list_actions.values()) + ["prefetch"]:
+            if a in self.interface:
+                self._set_command(a)
+
+        if not self.transport.is_local:
+            for a, list_action in self._list_actions.items():
+                if a not in self._batch and not hasattr(self, list_action + "_cmd"):
+                    self.logger.warning("**%s: the %s check has no batch mode nor %s command. "
+                                        "A remote command will be executed for each package.**" %
+                                        (self.name, a, list_action))
+
+    @property
+    def packages(self):
+        """list: All packages in the order they were found in the packages lists.
+        """
+        return self.registry.names()
+
+    @property
+    def existent_pkgs(self):
+        """list: Packages that exist in the software sources.
+        """
+        return self.registry.names(exists=True)
+
+    @property
+    def non_existent_pkgs(self):
+        """list: Packages that DOES NOT exist in the software sources.
+        """
+        return self.registry.names(exists=False)
 
-    def _validate(self, pkgs_list, schema, file_path, schema_key):
-        if json_schema_utils.JSONSCHEMA_INSTALLED:
-            json_schema_utils.validate(
-                pkgs_list, schema,
-                error_message_extra_info="\n".join([
-                    "File: %s" % file_path,
-                    "Data key: %s" % schema_key
-                ]),
-                logger=self.logger)
+    @property
+    def installed_pkgs(self):
+        """list: Packages that are installed in the system.
+        """
+        return self.registry.names(installed=True)
+
+    @property
+    def not_installed_pkgs(self):
+        """list: Packages that ARE NOT installed in the system.
+        """
+        return self.registry.names(installed=False)
+
+    @property
+    def pkgs_to_handle(self):
+        """list: Packages that will be actually processed depending on an action (``install`` or
+        ``remove``).
+        """
+        return self.registry.names(handle=True)
+
+    @pkgs_to_handle.setter
+    def pkgs_to_handle(self, names):
+        self.registry.set_handled(names)
 
     def _set_command(self, action):
         """Set command for action.
@@ -165,7 +337,9 @@ class PackageManager():
         None
             Halt execution.
         """
-        cmd = cmd_utils.which(self.interface[action].get("cmd", ""))
+        # Commands executed on another host can't be looked up locally.
+        which = cmd_utils.which if self.transport.is_local else lambda c: c
+        cmd = which(self.interface[action].get("cmd", ""))
         cmd_args = self.interface[action].get("cmd_args", [])
 
         if not cmd:
@@ -173,7 +347,7 @@ class PackageManager():
 
         cmd_args.insert(0, cmd)
 
-        elevator = cmd_utils.which(self.interface[action].get("elevator", ""))
+        elevator = which(self.interface[action].get("elevator", ""))
         elevator_args = self.interface[action].get("elevator_args", [])
 
         if elevator:
@@ -182,6 +356,168 @@ class PackageManager():
         else:
             setattr(self, action + "_cmd", cmd_args)
 
+    def _set_batch(self, action):
+        """Set batch mode definition for a check action.
+
+        Parameters
+        ----------
+        action : str
+            The action to perform.
+        """
+        batch = self.interface[action].get("batch")
+
+        if batch is None:
+            return
+
+        self._batch[action] = _get_output_parser(batch)
+        self._batch[action]["chunk_size"] = batch.get("chunk_size", _batch_default_chunk_size)
+
+    def _set_timeout(self, action):
+        """Set the time limits of the command of a check action.
+
+        Parameters
+        ----------
+        action : str
+            The action to perform.
+        """
+        timeout = self.interface[action].get("timeout")
+
+        if timeout is None:
+            return
+
+        self._timeouts[action] = {
+            "timeout": timeout,
+            "retries": self.interface[action].get("retries", 0),
+            "retry_delay": self.interface[action].get("retry_delay", _retry_default_delay)
+        }
+
+    def _get_listed_packages(self, action):
+        """Get all the packages that pass a check action.
+
+        The packages are obtained from the native backend defined for the check action or,
+        if not defined, from the list command associated to the check action. They are
+        obtained only once and the result is stored for later use.
+
+        Parameters
+        ----------
+        action : str
+            The check action (``exists`` or ``installed``).
+
+        Returns
+        -------
+        frozenset, None
+            The names of the listed packages. ``None`` if the interface doesn't define a native
+            backend nor a list command for the action or if both failed.
+
+        Raises
+        ------
+        exceptions.KeyboardInterruption
+            Halt execution.
+        """
+        if action in self._listed_pkgs:
+            return self._listed_pkgs[action]
+
+        self._listed_pkgs[action] = None
+        native = self.interface[action].get("native")
+
+        # The databases of other hosts can't be read directly.
+        if native is not None and self.transport.is_local:
+            try:
+                self._listed_pkgs[action] = self._get_native_backend(action,
+                                                                     native).get_packages()
+
+                return self._listed_pkgs[action]
+            except (OSError, ValueError) as err:
+                self.errors.add(str(err), action=action)
+                self.logger.warning("**%s native backend failed. Falling back to %s command.**" %
+                                    (native["backend"], action))
+
+        list_action = self._list_actions[action]
+
+        if not hasattr(self, list_action + "_cmd"):
+            return None
+
+        cmd = getattr(self, list_action + "_cmd")
+        fingerprint_paths = self.interface[list_action].get(
+            "fingerprint_paths", self.interface.get("cache", {}).get("fingerprint_paths"))
+        fingerprint = None
+
+        # Without fingerprint paths, there is no way to know when the listed packages change.
+        if fingerprint_paths:
+            # Taken before listing. Changes made while listing make the listed packages outdated.
+            fingerprint = check_cache.get_fingerprint(fingerprint_paths)
+            stored = self._listed_store.get(list_action)
+
+            if stored is not None and stored[0] == cmd and stored[1] == fingerprint:
+                self._listed_pkgs[action] = stored[2]
+
+                return self._listed_pkgs[action]
+
+        try:
+            output = self.transport.run(cmd,
+                                        stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE,
+                                        check=True).stdout
+        except subprocess.CalledProcessError as err:
+            self.errors.add("Command failed.", action=list_action, returncode=err.returncode,
+                            output=err.stderr)
+            self.logger.warning("**%s command failed. Falling back to %s command.**" %
+                                (list_action, action))
+            return None
+        except OSError as err:
+            self.errors.add(str(err), action=list_action)
+            self.logger.warning("**%s command failed. Falling back to %s command.**" %
+                                (list_action, action))
+            return None
+        except KeyboardInterrupt:
+            raise exceptions.KeyboardInterruption()
+
+        listed_pkgs = set()
+
+        for pkg, passed in _parse_output(output, _get_output_parser(self.interface[list_action])):
+            if passed:
+                listed_pkgs.add(pkg)
+                # Some package managers append the architecture to the package name.
+                listed_pkgs.add(pkg.split(":", 1)[0])
+
+        self._listed_pkgs[action] = frozenset(listed_pkgs)
+
+        if fingerprint is not None:
+            self._listed_store[list_action] = (cmd, fingerprint, self._listed_pkgs[action])
+
+        return self._listed_pkgs[action]
+
+    def _get_native_backend(self, action, native):
+        """Get the native backend of a check action.
+
+        A backend kept in memory (see ``listed_store`` in :any:`PackageManager`) is reused if its
+        definition didn't change. It reloads its database only if the database changed.
+
+        Parameters
+        ----------
+        action : str
+            The check action (``exists`` or ``installed``).
+        native : dict
+            The native backend definition.
+
+        Returns
+        -------
+        object
+            A native backend instance. See :any:`native_backends.get_backend`.
+        """
+        stored = self._listed_store.get(action)
+
+        if stored is not None and stored[0] == native:
+            stored[1].refresh()
+
+            return stored[1]
+
+        backend = native_backends.get_backend(native, cache_dir=_paths_map["cache"],
+                                              root=self.root)
+        self._listed_store[action] = (native, backend)
+
+        return backend
+
     def _perform_final_action(self, action):
         """Perform file action.
 
@@ -190,7 +526,8 @@ class PackageManager():
         action : str
             The action to perform.
         """
-        cmd = getattr(self, action + "_cmd") + self.pkgs_to_handle
+        pkgs_to_handle = self.pkgs_to_handle
+        base_cmd = getattr(self, action + "_cmd")
 
         if action == "install":
             action_verb = "Installing..."
@@ -199,186 +536,1783 @@ class PackageManager():
             action_verb = "Removing..."
             action_noun = "removal"
 
-        if len(self.pkgs_to_handle) > 0:
-            self.logger.info("**Command that will be executed:**\n%s" % " ".join(cmd))
+        if len(pkgs_to_handle) > 0:
+            chunks = _get_command_chunks(base_cmd, pkgs_to_handle,
+                                         self.interface[action].get("chunk_size"),
+                                         self.transport)
+
+            if len(chunks) == 1:
+                self.logger.info("**Command that will be executed:**\n%s" %
+                                 " ".join(base_cmd + pkgs_to_handle))
+            else:
+                self.logger.info("**Command that will be executed %d times (%d packages per "
+                                 "execution at most):**\n%s <packages>" %
+                                 (len(chunks), max(len(c) for c in chunks), " ".join(base_cmd)))
+
+            prefetch = None
+
+            if action == "install" and hasattr(self, "prefetch_cmd"):
+                prefetch = self._start_prefetch(pkgs_to_handle)
+
+            from .python_utils import prompts
 
-            if prompts.confirm(prompt=Ansi.MAGENTA("**Proceed with package %s?**") % action_noun,
-                               response=False):
+            try:
+                confirmed = prompts.confirm(
+                    prompt=Ansi.MAGENTA("**Proceed with package %s?**") % action_noun,
+                    response=False)
+            except BaseException:
+                self._finish_prefetch(prefetch, cancel=True)
+                raise
+
+            self._finish_prefetch(prefetch, cancel=not confirmed)
+
+            if confirmed:
                 self.logger.info(action_verb)
-                cmd_utils.run_cmd(cmd,
-                                  stdout=None,
-                                  stderr=None)
+                failed_pkgs = []
+
+                for chunk in chunks:
+                    failed_pkgs.extend(self._run_command_chunk(base_cmd, chunk, action))
+
+                # The system state changed. The stored check results are useless now.
+                if self._cache is not None:
+                    self._cache.clear()
+
+                if failed_pkgs:
+                    self.logger.warning("**%d packages failed the package %s:**\n%s" %
+                                        (len(failed_pkgs), action_noun, "\n".join(failed_pkgs)))
             else:
                 self.logger.info("**%s canceled**" % action_noun.capitalize())
         else:
             self.logger.info("**No packages to handle**")
 
-    def _filter_packages(self, action):
-        """Filter packages.
+    def _start_prefetch(self, pkgs):
+        """Start downloading packages in the background.
 
         Parameters
         ----------
-        action : str
-            The action to perform.
+        pkgs : list
+            The packages to download.
+
+        Returns
+        -------
+        dict
+            The data needed by :any:`PackageManager._finish_prefetch`.
         """
-        self.pkgs_to_handle = self.packages[:]
+        base_cmd = self.prefetch_cmd
+        chunk_size = self.interface["prefetch"].get("chunk_size",
+                                                    -(-len(pkgs) // self._jobs))
+        prefetch = {
+            "executor": ThreadPoolExecutor(max_workers=self._jobs),
+            "procs": [],
+            "canceled": False,
+            "lock": threading.Lock(),
+            "start": time.perf_counter()
+        }
+        prefetch["futures"] = [
+            prefetch["executor"].submit(self._prefetch_chunk, base_cmd, chunk, prefetch)
+            for chunk in _get_command_chunks(base_cmd, pkgs, chunk_size, self.transport)
+        ]
+
+        return prefetch
+
+    def _prefetch_chunk(self, base_cmd, pkgs, prefetch):
+        """Download a chunk of packages.
 
-        if self._ignore_exists_check:
-            self.logger.warning("Check for package existence ignored")
-        else:
-            # If non-existent, do not try to install.
-            self.pkgs_to_handle = list(
-                filter(lambda p: self._check_package(p, "exists"),
-                       tqdm(self.pkgs_to_handle, desc="Filtering non existent packages...", unit="pkgs"))
-            )
+        Parameters
+        ----------
+        base_cmd : list
+            The prefetch command without packages.
+        pkgs : list
+            The packages to download.
+        prefetch : dict
+            See :any:`PackageManager._start_prefetch`.
 
-        if self._ignore_installed_check:
-            self.logger.warning("Check for package installed state ignored")
-        else:
-            # If installed, do not try to install.
-            self.pkgs_to_handle = list(
-                filter(lambda p: (not self._check_package(p, "installed")),
-                       tqdm(self.pkgs_to_handle, desc="Filtering installed packages...", unit="pkgs"))
-            )
+        Returns
+        -------
+        bool
+            If the download succeeded.
+        """
+        start = time.perf_counter()
 
-    def _check_package(self, pkg, action):
-        """Check package existence/installed state.
+        # Do not start a download while the downloads are being canceled.
+        with prefetch["lock"]:
+            if prefetch["canceled"]:
+                return False
+
+            try:
+                proc = self.transport.popen(base_cmd + pkgs,
+                                            stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.DEVNULL,
+                                            stderr=subprocess.PIPE,
+                                            # Own process group so the whole process tree can be
+                                            # killed.
+                                            start_new_session=True)
+            except OSError as err:
+                self.errors.add(str(err), action="prefetch")
+                return False
+
+            prefetch["procs"].append(proc)
+
+        stderr = proc.communicate()[1]
+
+        if proc.returncode == 0:
+            return True
+
+        # Downloads killed on purpose didn't fail.
+        if not prefetch["canceled"]:
+            # E.g. an elevator that can't ask for a password without a terminal.
+            self.errors.add("Prefetch command failed for %d packages (%s ... %s)." %
+                            (len(pkgs), pkgs[0], pkgs[-1]), action="prefetch",
+                            returncode=proc.returncode, output=stderr,
+                            duration=time.perf_counter() - start)
+
+        return False
+
+    def _finish_prefetch(self, prefetch, cancel=False):
+        """Wait for the background downloads to finish.
 
         Parameters
         ----------
-        pkg : str
-            The name of a package.
+        prefetch : dict, None
+            See :any:`PackageManager._start_prefetch`.
+        cancel : bool, optional
+            Stop the downloads instead of waiting for them.
+        """
+        if prefetch is None:
+            return
+
+        if cancel:
+            with prefetch["lock"]:
+                prefetch["canceled"] = True
+
+                for proc in prefetch["procs"]:
+                    if proc.poll() is None:
+                        try:
+                            os.killpg(proc.pid, signal.SIGTERM)
+                        except OSError:
+                            pass
+        elif not all(f.done() for f in prefetch["futures"]):
+            self.logger.info("Waiting for package downloads to finish...")
+
+        prefetch["executor"].shutdown(wait=True)
+
+        if not cancel:
+            results = [f.result() for f in prefetch["futures"]]
+            failed = results.count(False)
+            msg = "Packages downloaded in %d chunks in %.2f seconds. %d chunks failed." % (
+                len(results), time.perf_counter() - prefetch["start"], failed)
+
+            if failed:
+                errors = [str(e) for e in self.errors if e.action == "prefetch"]
+                self.logger.warning("**%s The packages will be downloaded by the install "
+                                    "command.**\n%s" % (msg, errors[0] if errors else ""))
+                self.logger.info("**Prefetch errors:**\n%s" % "\n".join(errors), term=False)
+            else:
+                self.logger.info(msg, term=False)
+
+    def _run_command_chunk(self, base_cmd, pkgs, action, capture=False):
+        """Run the final command for a chunk of packages.
+
+        If the command fails, the chunk is split in halves and each half is run again until the
+        failing packages are isolated. That's always done if the command couldn't be executed
+        (e.g. its arguments are too long) and, otherwise, only if the command doesn't read from
+        the terminal or the interface enables ``bisect`` (asking for confirmation before each
+        retry). A command aborted by the user is never run again.
+
+        Parameters
+        ----------
+        base_cmd : list
+            The command without packages.
+        pkgs : list
+            The packages to pass to the command.
         action : str
-            The action to perform.
+            The action performed (``install`` or ``remove``).
+        capture : bool, optional
+            Write the command output to the log file instead of the terminal and do not let the
+            command read from the terminal.
 
         Returns
         -------
-        bool
-            If the check passed.
+        list
+            The packages for which the command failed.
 
         Raises
         ------
         exceptions.KeyboardInterruption
             Halt execution.
         """
-        check_passed = True
+        start = time.perf_counter()
 
         try:
-            cmd_utils.run_cmd(getattr(self, action + "_cmd") + [pkg],
-                              stdout=subprocess.DEVNULL,
-                              stderr=subprocess.STDOUT,
-                              check=True)
-        except subprocess.CalledProcessError as err:
-            self.errors.append(str(err))
-            check_passed = False
+            if capture:
+                p = self.transport.run(base_cmd + pkgs,
+                                       stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT)
+                self.logger.info(p.stdout.decode("utf-8", "replace"), term=False)
+            else:
+                p = self.transport.run(base_cmd + pkgs, interactive=True, stdout=None, stderr=None)
+
+            returncode = p.returncode
+        except OSError as err:
+            # Most likely, E2BIG.
+            self.errors.add(str(err), action=action)
+            returncode = None
         except KeyboardInterrupt:
             raise exceptions.KeyboardInterruption()
 
-        if action == "installed":
-            self.installed_pkgs.append(pkg) if check_passed else self.not_installed_pkgs.append(pkg)
-        elif action == "exists":
-            self.existent_pkgs.append(pkg) if check_passed else self.non_existent_pkgs.append(pkg)
+        self.logger.info("Chunk of %d packages (%s ... %s) finished in %.2f seconds. %s" % (
+            len(pkgs), pkgs[0], pkgs[-1], time.perf_counter() - start,
+            "Success." if returncode == 0 else "Failed (return code: %s)." % returncode),
+            term=False)
 
-        return check_passed
+        if returncode == 0:
+            return []
 
-    def _display_initial_report(self, action):
-        """Display initial report.
+        definition = self.interface[action]
+
+        if returncode in _default_abort_status + definition.get("abort_status", []):
+            self.logger.warning("**Command aborted (return code: %s). It won't be run again.**" %
+                                returncode)
+            return pkgs
+
+        if len(pkgs) == 1:
+            return pkgs
+
+        if returncode is not None and not capture:
+            if not definition.get("bisect", False):
+                return pkgs
+
+            from .python_utils import prompts
+
+            if not prompts.confirm(
+                    prompt=Ansi.MAGENTA("**Command failed for a chunk of %d packages. Run it again "
+                                        "in halves to isolate the failing packages?**") % len(pkgs),
+                    response=False):
+                return pkgs
+
+        half = len(pkgs) // 2
+        self.logger.warning("**Command failed for a chunk of %d packages. Retrying in halves...**" %
+                            len(pkgs))
+
+        return self._run_command_chunk(base_cmd, pkgs[:half], action, capture) + \
+            self._run_command_chunk(base_cmd, pkgs[half:], action, capture)
+
+    def _stream_packages(self, action):
+        """Filter packages and install/remove them at the same time.
+
+        Packages that pass all checks are put into a bounded queue. A separate thread takes them
+        from the queue and passes them in chunks to the install/remove command.
 
         Parameters
         ----------
         action : str
             The action to perform.
         """
-        self.log_details("Packages processed:", self.packages)
+        chunk_size = self.interface[action].get("chunk_size", _stream_default_chunk_size)
+        pkgs_queue = queue.Queue(maxsize=_stream_queue_size)
+        stop = threading.Event()
+        failed_pkgs = []
+        consumer = threading.Thread(target=self._stream_consumer,
+                                    args=(pkgs_queue, action, chunk_size, stop, failed_pkgs))
 
-        if self._ignore_exists_check:
-            non_existent = ""
-            existent = ""
-            self.log_details("Check for package existence ignored", [])
-        else:
-            non_existent = "- {} packages are NOT available on the software sources.\n".format(
-                len(self.non_existent_pkgs))
-            existent = "- {} packages are available on the software sources.\n".format(
-                len(self.existent_pkgs))
+        self.logger.info("**Packages will be passed to the %s command as soon as they are "
+                         "checked. The command output is only written to the log file.**" % action)
+        consumer.start()
 
-            self.log_details("Packages non existent on software sources:", self.non_existent_pkgs)
-            self.log_details("Packages available on software sources", self.existent_pkgs)
+        try:
+            self._filter_packages(action, on_kept=pkgs_queue.put)
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            pkgs_queue.put(None)
+            consumer.join()
 
-        if self._ignore_installed_check:
-            not_installed = ""
-            installed = ""
-            self.log_details("Check for package installed state ignored", [])
-        else:
-            not_installed = "- {} packages are NOT installed.\n".format(
-                len(self.not_installed_pkgs))
-            installed = "- {} packages are already installed.\n".format(
-                len(self.installed_pkgs))
+            # The system state changed. The stored check results are useless now.
+            if self._cache is not None:
+                self._cache.clear()
 
-            self.log_details("Packages NOT installed:", self.not_installed_pkgs)
-            self.log_details("Packages installed:", self.installed_pkgs)
+        if failed_pkgs:
+            self.logger.warning("**%d packages failed the %s command:**\n%s" %
+                                (len(failed_pkgs), action, "\n".join(failed_pkgs)))
 
-        self.log_details("Errors raised while gathering package information:", self.errors)
+    def _stream_consumer(self, pkgs_queue, action, chunk_size, stop, failed_pkgs):
+        """Pass packages taken from a queue to the install/remove command.
 
-        getattr(self.logger, "warning" if len(self.errors) > 0 else "info")(_summary.format(
-            pkgs_list=len(self.packages),
-            non_existent=non_existent,
-            existent=existent,
-            not_installed=not_installed,
-            installed=installed,
-            errors=len(self.errors),
-            pkgs_to_handle=len(self.pkgs_to_handle),
-            log_file=self.logger.get_log_file()
-        ))
+        A chunk is passed to the command when it reaches ``chunk_size`` packages or when no more
+        packages arrived for a little while.
 
-    def manage_packages(self, action):
-        """Manage packages.
+        Parameters
+        ----------
+        pkgs_queue : queue.Queue
+            Queue from which to take lists of packages. ``None`` marks the end of the queue.
+        action : str
+            The action performed (``install`` or ``remove``).
+        chunk_size : int
+            Maximum amount of packages per command execution.
+        stop : threading.Event
+            Stop executing commands when set. The queue is still drained.
+        failed_pkgs : list
+            Storage for the packages for which the command failed.
+        """
+        base_cmd = getattr(self, action + "_cmd")
+        finished = False
+
+        while not finished:
+            chunk = []
+            item = pkgs_queue.get()
+
+            while True:
+                if item is None:
+                    finished = True
+                    break
+
+                chunk.extend(item)
+
+                if len(chunk) >= chunk_size:
+                    break
+
+                try:
+                    item = pkgs_queue.get(timeout=_stream_linger)
+                except queue.Empty:
+                    break
+
+            if not chunk or stop.is_set():
+                continue
+
+            try:
+                for c in _get_command_chunks(base_cmd, chunk, chunk_size, self.transport):
+                    # Package managers usually lock their databases. Only one command per host.
+                    with self._final_action_lock:
+                        failed_pkgs.extend(self._run_command_chunk(base_cmd, c, action,
+                                                                   capture=True))
+            except Exception as err:
+                self.errors.add(str(err), action=action)
+                failed_pkgs.extend(chunk)
+
+    def _filter_packages(self, action, on_kept=None):
+        """Filter packages.
 
         Parameters
         ----------
         action : str
             The action to perform.
+        on_kept : callable, optional
+            Function called with a list of packages as soon as they pass all checks.
         """
-        if action:
-            self._filter_packages(action)
-            self._display_initial_report(action)
-            self._perform_final_action(action)
+        self.pkgs_to_handle = self.packages
+        stages = []
+        start = time.perf_counter()
 
-    def log_details(self, msg, plist):
-        """Log lists of packages.
+        if self._ignore_exists_check:
+            self.logger.warning("Check for package existence ignored")
+        else:
+            # If non-existent, do not try to install.
+            stages.append(("exists", True))
+
+        if self._ignore_installed_check:
+            self.logger.warning("Check for package installed state ignored")
+        else:
+            # If installed, do not try to install.
+            stages.append(("installed", False))
+
+        if not stages:
+            if on_kept is not None:
+                on_kept(self.packages)
+
+            return
+
+        self._journal = check_cache.CheckJournal(_paths_map["journals"], self._storage_name,
+                                                 resume=self._resume)
 
-        Log complete the lists of packages sorted, one per line, and do not display them in terminal.
+        if self._resume:
+            self.logger.info("**Resuming run. %d recorded check results found.**" %
+                             len(self._journal))
+
+        finished = False
+
+        try:
+            self.pkgs_to_handle = self._run_checks(self.pkgs_to_handle, stages, on_kept)
+            finished = True
+        finally:
+            # Only keep the journal if the run was interrupted.
+            self._journal.close(remove=finished)
+            self._journal = None
+
+            if self._cache is not None:
+                self._cache.save()
+
+            if not finished:
+                self.logger.warning("**Checks interrupted. Use --resume to continue them.**")
+
+        self._check_wall_time = time.perf_counter() - start
+
+        self._log_check_stats()
+
+    def _run_checks(self, pkgs, stages, on_kept=None):
+        """Run package checks concurrently.
+
+        The checks are chained. A package is passed to the next check as soon as it passes the
+        previous one, so the checks of different stages overlap and a package excluded by a check
+        isn't checked any further.
 
         Parameters
         ----------
-        msg : str
-            Message
-        plist : list
-            Package list.
+        pkgs : list
+            The packages to check.
+        stages : list
+            List of tuples containing a check action (``exists`` or ``installed``) and whether
+            to keep the packages that passed the check or the ones that didn't.
+        on_kept : callable, optional
+            Function called with a list of packages as soon as they pass all checks.
+
+        Returns
+        -------
+        list
+            The filtered list of packages, in the same order as ``pkgs``.
+
+        Raises
+        ------
+        exceptions.KeyboardInterruption
+            Halt execution.
         """
-        self.logger.info(msg + "\n" + ("\n".join(sorted(plist)) if plist else "None"), term=False)
+        kept = set()
+        # Packages waiting to fill a batch chunk.
+        buffers = [[] for s in stages]
+        # Chunks of packages ready to be checked.
+        queues = [deque() for s in stages]
+        futures = {}
+        self._check_stats = {a: {"processed": 0, "resolved": 0, "time": 0.0} for a, k in stages}
+
+        for a, k in stages:
+            self._get_listed_packages(a)
+
+        def feed(index, chunk):
+            if index == len(stages):
+                kept.update(chunk)
+                pbar.update(len(chunk))
+
+                if on_kept is not None and chunk:
+                    on_kept(chunk)
+
+                return
+
+            action, keep_passed = stages[index]
+            known, unknown = self._get_known_results(chunk, action)
+
+            if known:
+                self._check_stats[action]["resolved"] += len(known)
+                passed = [p for p in chunk if known.get(p) is keep_passed]
+                pbar.update(len(known) - len(passed))
+                feed(index + 1, passed)
+
+            if action in self._batch:
+                chunk_size = self._batch[action]["chunk_size"]
+                buffers[index].extend(unknown)
+
+                while len(buffers[index]) >= chunk_size:
+                    queues[index].append(buffers[index][:chunk_size])
+                    del buffers[index][:chunk_size]
+            else:
+                queues[index].extend([p] for p in unknown)
+
+        def flush():
+            # A partially filled batch chunk can only be queued once no more packages can reach it.
+            for index in range(len(stages)):
+                if buffers[index]:
+                    queues[index].append(buffers[index])
+                    buffers[index] = []
+
+                if queues[index] or any(i <= index for i, c in futures.values()):
+                    return
+
+        def dispatch():
+            # Give priority to the last stages so packages are fully processed as soon as possible.
+            while len(futures) < self._jobs:
+                for index in reversed(range(len(stages))):
+                    if queues[index]:
+                        chunk = queues[index].popleft()
+                        future = executor.submit(self._timed_check, chunk, stages[index][0])
+                        futures[future] = (index, chunk)
+                        break
+                else:
+                    return
+
+        from .python_utils.tqdm import tqdm
+
+        executor = ThreadPoolExecutor(max_workers=self._jobs)
+
+        try:
+            if self._progress_position is None:
+                pbar_options = {"desc": "Checking packages..."}
+            else:
+                pbar_options = {"desc": "Checking packages (%s)..." % self.name,
+                                "position": self._progress_position}
 
+            with tqdm(total=len(pkgs), unit="pkgs", **pbar_options) as pbar:
+                feed(0, pkgs)
 
-def print_config_files_list(file_type):
-    """Print config files list.
+                while True:
+                    # The checks of another interface were interrupted.
+                    if self._checks_canceled:
+                        raise KeyboardInterrupt
 
-    Used to print to standard output the list of configuration files (either "packages_lists" or
-    "interfaces" configuration files). The output is used only by the Bash completions script.
+                    flush()
+                    dispatch()
 
-    Parameters
-    ----------
-    file_type : str
-        One of "packages_lists" or "interfaces".
-    """
-    # FUTURE:
-    # Use context manager with os.scandir().
-    list_of_files = [entry.name for entry in os.scandir(_paths_map[file_type]) if
-                     entry.is_file(follow_symlinks=False)]
+                    if not futures:
+                        break
+
+                    for future in wait(futures, return_when=FIRST_COMPLETED).done:
+                        index, chunk = futures.pop(future)
+                        action, keep_passed = stages[index]
+                        results, elapsed = future.result()
+                        self._check_stats[action]["processed"] += len(chunk)
+                        self._check_stats[action]["time"] += elapsed
+
+                        for p in chunk:
+                            # Timed out and failed checks have no result.
+                            if results[p] is None:
+                                continue
+
+                            self._journal.record(action, p, results[p])
+
+                            if self._cache is not None:
+                                self._cache.set(action, p, results[p])
+
+                        self._journal.flush()
+
+                        passed = [p for p in chunk if results[p] is keep_passed]
+                        pbar.update(len(chunk) - len(passed))
+                        feed(index + 1, passed)
+        except BaseException as err:
+            # An interruption noticed by a check comes out of future.result() as a SystemExit
+            # (this application exceptions exit when they are created). Stop the other checks too.
+            for future in futures:
+                future.cancel()
+
+            self._kill_check_procs()
+
+            if isinstance(err, KeyboardInterrupt):
+                raise exceptions.KeyboardInterruption()
+
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
+        return [p for p in pkgs if p in kept]
+
+    def _get_known_results(self, pkgs, action):
+        """Get the check results that are known without executing any command.
+
+        Parameters
+        ----------
+        pkgs : list
+            The packages to check.
+        action : str
+            The check action.
+
+        Returns
+        -------
+        tuple
+            A dictionary with the known check results and a list of the packages whose check
+            result isn't known.
+        """
+        known = {}
+        unknown = []
+        listed_pkgs = self._get_listed_packages(action)
+
+        for p in pkgs:
+            if listed_pkgs is not None:
+                check_passed = p in listed_pkgs
+            else:
+                check_passed = None
+
+                if self._journal is not None:
+                    check_passed = self._journal.get(action, p)
+
+                if check_passed is None and self._cache is not None:
+                    check_passed = self._cache.get(action, p)
+
+            if check_passed is None:
+                unknown.append(p)
+            else:
+                known[p] = check_passed
+                self._store_check_result(p, action, check_passed)
+
+        return known, unknown
+
+    def _timed_check(self, pkgs, action):
+        """Check packages and measure the time it took.
+
+        Parameters
+        ----------
+        pkgs : list
+            The packages to check. More than one package is only allowed in batch mode.
+        action : str
+            The check action.
+
+        Returns
+        -------
+        tuple
+            A dictionary with the check results and the elapsed time in seconds.
+        """
+        start = time.perf_counter()
+
+        if action in self._batch:
+            results = self._check_packages_batch(pkgs, action)
+        else:
+            results = {pkgs[0]: self._check_package(pkgs[0], action)}
+
+        return results, time.perf_counter() - start
+
+    def _log_check_stats(self):
+        """Log the statistics of the last executed checks.
+        """
+        self.logger.info("**Checks statistics:**\n" + "\n".join(
+            "- %s: %d packages checked in %.2f seconds (accumulated time of all checks). "
+            "%d packages resolved without checking." % (a, s["processed"], s["time"], s["resolved"])
+            for a, s in self._check_stats.items()
+        ))
+
+    def _run_check_cmd(self, cmd, action, **kwargs):
+        """Run the command of a check action honoring its time limits.
+
+        If the action has a timeout, the command is run in its own process group so it can be
+        killed together with all its child processes.
+
+        Parameters
+        ----------
+        cmd : list
+            The command to run.
+        action : str
+            The check action.
+        **kwargs
+            See :any:`subprocess.Popen`.
+
+        Returns
+        -------
+        subprocess.CompletedProcess, None
+            The finished process. ``None`` if all the command calls timed out.
+        """
+        limits = self._timeouts.get(action)
+
+        if limits is None:
+            return self.transport.run(cmd, **kwargs)
+
+        delay = limits["retry_delay"]
+
+        for attempt in range(limits["retries"] + 1):
+            if attempt:
+                time.sleep(delay)
+                delay *= 2
+
+            with self._check_procs_lock:
+                if self._checks_canceled:
+                    return None
+
+                p = self.transport.popen(cmd, start_new_session=True, **kwargs)
+                self._check_procs.add(p)
+
+            try:
+                stdout, stderr = p.communicate(timeout=limits["timeout"])
+            except subprocess.TimeoutExpired:
+                _kill_process_group(p)
+                continue
+            finally:
+                with self._check_procs_lock:
+                    self._check_procs.discard(p)
+
+            return subprocess.CompletedProcess(cmd, p.returncode, stdout, stderr)
+
+        return None
+
+    def _is_negative_status(self, action, returncode):
+        """Check if the exit status of a check command is an expected negative result.
+
+        Parameters
+        ----------
+        action : str
+            The check action.
+        returncode : int
+            The exit status of the check command.
+
+        Returns
+        -------
+        bool
+            If the exit status means that the check didn't pass. Otherwise, the check command
+            failed.
+        """
+        # The command might not even have been executed.
+        if returncode in self.transport.failure_status:
+            return False
+
+        negative_status = self.interface[action].get("negative_status")
+
+        if negative_status is not None:
+            return returncode in negative_status
+
+        # Signals, "command not executable" and "command not found" are never expected results.
+        return returncode > 0 and returncode not in (126, 127)
+
+    def _add_timeout_error(self, action, pkg, duration):
+        """Record a check that timed out.
+
+        Parameters
+        ----------
+        action : str
+            The check action.
+        pkg : str, None
+            The checked package. ``None`` for batch checks.
+        duration : float
+            Seconds spent on all the attempts.
+        """
+        limits = self._timeouts[action]
+        self.errors.add("Command timed out after %d attempts (%s seconds each)." %
+                        (limits["retries"] + 1, limits["timeout"]),
+                        package=pkg, action=action, duration=duration)
+
+    def _kill_check_procs(self):
+        """Kill the running check commands that were started in their own process group.
+        """
+        with self._check_procs_lock:
+            self._checks_canceled = True
+
+            # The processes are reaped by the threads that started them.
+            for p in self._check_procs:
+                try:
+                    os.killpg(p.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+
+    def _check_package(self, pkg, action):
+        """Check package existence/installed state.
+
+        Parameters
+        ----------
+        pkg : str
+            The name of a package.
+        action : str
+            The action to perform.
+
+        Returns
+        -------
+        bool, None
+            If the check passed. ``None`` if the check timed out or the check command failed.
+
+        Raises
+        ------
+        exceptions.KeyboardInterruption
+            Halt execution.
+        """
+        check_passed = True
+        failed = False
+        start = time.perf_counter()
+
+        try:
+            p = self._run_check_cmd(getattr(self, action + "_cmd") + [pkg], action,
+                                    stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.PIPE)
+            duration = time.perf_counter() - start
+
+            if p is None:
+                check_passed = None
+                self._add_timeout_error(action, pkg, duration)
+            elif p.returncode == -signal.SIGINT:
+                # The check didn't fail, it was interrupted.
+                raise exceptions.KeyboardInterruption()
+            elif self._is_negative_status(action, p.returncode):
+                check_passed = False
+            elif p.returncode != 0:
+                # An unknown result. It must not be taken as a negative one (nor stored).
+                check_passed = None
+                failed = True
+                self.errors.add("Check command failed.", package=pkg, action=action,
+                                returncode=p.returncode, output=p.stderr, duration=duration)
+        except OSError as err:
+            check_passed = None
+            failed = True
+            self.errors.add(str(err), package=pkg, action=action)
+        except KeyboardInterrupt:
+            raise exceptions.KeyboardInterruption()
+
+        self._store_check_result(pkg, action, check_passed, failed)
+
+        return check_passed
+
+    def _check_packages_batch(self, pkgs, action):
+        """Check existence/installed state of several packages with a single command call.
+
+        Parameters
+        ----------
+        pkgs : list
+            The names of the packages to check.
+        action : str
+            The action to perform.
+
+        Returns
+        -------
+        dict
+            The check result for each of the packages. ``None`` for all of them if the check
+            timed out or the check command failed.
+
+        Raises
+        ------
+        exceptions.KeyboardInterruption
+            Halt execution.
+        """
+        batch = self._batch[action]
+        results = dict.fromkeys(pkgs, False)
+        start = time.perf_counter()
+
+        try:
+            p = self._run_check_cmd(getattr(self, action + "_cmd") + pkgs, action,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE)
+            duration = time.perf_counter() - start
+
+            if p is None:
+                self._add_timeout_error(action, None, duration)
+
+                return self._store_unknown_results(pkgs, action)
+
+            # The check was interrupted.
+            if p.returncode == -signal.SIGINT:
+                raise exceptions.KeyboardInterruption()
+
+            # A command that failed outright must not be taken as "no package matched".
+            if p.returncode != 0 and (p.returncode in self.transport.failure_status or
+                                      p.returncode not in self.interface[action].get(
+                                          "negative_status", _batch_default_negative_status)):
+                self.errors.add("Batch check command failed for %d packages (%s ... %s)." %
+                                (len(pkgs), pkgs[0], pkgs[-1]), action=action,
+                                returncode=p.returncode, output=p.stderr, duration=duration)
+
+                return self._store_unknown_results(pkgs, action, failed=True)
+
+            output = p.stdout
+        except OSError as err:
+            self.errors.add(str(err), action=action)
+
+            return self._store_unknown_results(pkgs, action, failed=True)
+        except KeyboardInterrupt:
+            raise exceptions.KeyboardInterruption()
+
+        for pkg, passed in _parse_output(output, batch):
+            # Some package managers append the architecture to the package name.
+            if pkg not in results:
+                pkg = pkg.split(":", 1)[0]
+
+            if pkg in results:
+                results[pkg] = passed
+
+        for pkg in pkgs:
+            self._store_check_result(pkg, action, results[pkg])
+
+        return results
+
+    def _store_unknown_results(self, pkgs, action, failed=False):
+        """Store the results of a batch check that timed out or failed.
+
+        Parameters
+        ----------
+        pkgs : list
+            The names of the checked packages.
+        action : str
+            The action performed.
+        failed : bool, optional
+            If the check command failed. Otherwise, it timed out.
+
+        Returns
+        -------
+        dict
+            ``None`` as the check result of each of the packages.
+        """
+        for pkg in pkgs:
+            self._store_check_result(pkg, action, None, failed)
+
+        return dict.fromkeys(pkgs, None)
+
+    def _store_check_result(self, pkg, action, check_passed, failed=False):
+        """Store the result of a package check.
+
+        Parameters
+        ----------
+        pkg : str
+            The name of a package.
+        action : str
+            The action performed.
+        check_passed : bool, None
+            If the check passed. ``None`` if the check timed out or the check command failed.
+        failed : bool, optional
+            If the check command failed. Only relevant if ``check_passed`` is ``None``.
+        """
+        record = self.registry.get(pkg)
+
+        if self._reporter is not None:
+            self._reporter.check(self.target, pkg, action, check_passed)
+
+        if failed:
+            record.failed = True
+        elif check_passed is None:
+            record.timed_out = True
+        elif action == "installed":
+            record.installed = check_passed
+        elif action == "exists":
+            record.exists = check_passed
+
+    def get_plan(self):
+        """Get the result of the last executed checks.
+
+        Returns
+        -------
+        dict
+            The packages to handle, the amount of packages with each check result, the checks
+            timings and the errors.
+        """
+        counts = {
+            "total": 0,
+            "exists": 0,
+            "not_exists": 0,
+            "installed": 0,
+            "not_installed": 0,
+            "timed_out": 0,
+            "failed": 0
+        }
+
+        for r in self.registry:
+            counts["total"] += 1
+            counts["timed_out"] += r.timed_out
+            counts["failed"] += r.failed
+
+            if r.exists is not None:
+                counts["exists" if r.exists else "not_exists"] += 1
+
+            if r.installed is not None:
+                counts["installed" if r.installed else "not_installed"] += 1
+
+        return {
+            "to_handle": self.pkgs_to_handle,
+            "counts": counts,
+            "timings": {
+                "checks": self._check_stats,
+                "checks_wall_time": self._check_wall_time
+            },
+            "errors": self.errors.to_list(),
+            "errors_dropped": self.errors.dropped
+        }
+
+
+class PackageManagerGroup():
+    """Handle packages with several interfaces and/or on several target systems at once.
+
+    The packages lists and the interface files are loaded only once and the packages are routed
+    to each interface. A :any:`PackageManager` is created for each combination of host, interface
+    and root directory. The checks of all the managers of a host run at the same time and a limited
+    amount of hosts are handled at the same time. A report is displayed for each host.
+
+    Attributes
+    ----------
+    errors : error_records.ErrorLog
+        Errors raised while loading the packages lists.
+    logger : LogSystem
+        The logger.
+    managers : list
+        A :any:`PackageManager` instance for each host, interface and root directory.
+    """
+
+    def __init__(self, interfaces=[], pkgs_list_relative=[], pkgs_list_absolute=[],
+                 ignore_exists_check=False, ignore_installed_check=False, jobs=1,
+                 use_cache=True, refresh_cache=False, stream=False, resume=False, roots=[],
+                 hosts=[], max_hosts=_default_max_hosts, reporter=None, cache_store=None,
+                 listed_store=None, logger=None):
+        """
+        Parameters
+        ----------
+        interfaces : list
+            File names (no extension) of interface files in **UserData/interfaces**.
+        pkgs_list_relative : list, optional
+            List of names of file that can be found inside **UserData/packages_lists**.
+        pkgs_list_absolute : list, optional
+            List of absolute paths to files containing a packages list.
+        ignore_exists_check : bool, optional
+            Ignore the check for package existence.
+        ignore_installed_check : bool, optional
+            Ignore the check for package installed state.
+        jobs : int, optional
+            Maximum number of package checks to run concurrently for each interface.
+        use_cache : bool, optional
+            Use and store package check results if an interface defines a cache.
+        refresh_cache : bool, optional
+            Ignore the stored package check results.
+        stream : bool, optional
+            Install/remove packages while they are being checked, without asking for confirmation.
+        resume : bool, optional
+            Reuse the check results recorded by an interrupted run.
+        roots : list, optional
+            Root directories of the target systems. If empty, the running system is targeted.
+        hosts : list, optional
+            Hosts on which to handle packages. See :any:`transports.get_transport`. If empty, the
+            running system is targeted.
+        max_hosts : int, optional
+            Maximum number of hosts to handle at the same time.
+        reporter : reports.Reporter, None, optional
+            Where to write a machine readable report.
+        cache_store : dict, None, optional
+            See :any:`PackageManager`.
+        listed_store : dict, None, optional
+            See :any:`PackageManager`.
+        logger : LogSystem
+            The logger.
+        """
+        self._ignore_exists_check = ignore_exists_check
+        self._ignore_installed_check = ignore_installed_check
+        self._stream = stream
+        self._max_hosts = max(1, max_hosts)
+        self._reporter = reporter
+        self.logger = logger
+
+        routed, ignored, self.errors = load_packages_lists(pkgs_list_relative,
+                                                           pkgs_list_absolute,
+                                                           interfaces,
+                                                           logger)
+
+        if ignored:
+            self.logger.warning("**%d packages meant for other interfaces were ignored.**" %
+                                ignored)
+
+        definitions = {i: load_interface(i, logger) for i in interfaces}
+        targets = [(transports.get_transport(h), i, r)
+                   for h in (hosts or [None]) for i in interfaces for r in (roots or [None])]
+        final_action_locks = {t.host: threading.Lock() for t, i, r in targets}
+
+        self.managers = [PackageManager(
+            interface=i,
+            # The same lists are shared by all the root directories.
+            pkgs_lists=routed[i],
+            ignore_exists_check=ignore_exists_check,
+            ignore_installed_check=ignore_installed_check,
+            jobs=jobs,
+            use_cache=use_cache,
+            refresh_cache=refresh_cache,
+            stream=stream,
+            resume=resume,
+            progress_position=index if len(targets) > 1 else None,
+            root=r,
+            definition=definitions[i],
+            transport=t,
+            reporter=reporter,
+            cache_store=cache_store,
+            listed_store=listed_store,
+            final_action_lock=final_action_locks[t.host],
+            logger=logger
+        ) for index, (t, i, r) in enumerate(targets)]
+
+        # The managers of each host, in the order the hosts were specified.
+        self._hosts = OrderedDict()
+
+        for m in self.managers:
+            self._hosts.setdefault(m.transport.host, []).append(m)
+
+    def _run_checks(self, action):
+        """Run the checks of all hosts.
+
+        In stream mode, the packages are also installed/removed.
+
+        Parameters
+        ----------
+        action : str
+            The action to perform.
+
+        Raises
+        ------
+        exceptions.KeyboardInterruption
+            Halt execution.
+        """
+        if len(self._hosts) == 1:
+            self._run_managers_checks(self.managers, action)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self._max_hosts)
+        futures = [executor.submit(self._run_managers_checks, managers, action)
+                   for managers in self._hosts.values()]
+
+        try:
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+
+            self._cancel_checks()
+            raise exceptions.KeyboardInterruption()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+
+            self._cancel_checks()
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
+    def _run_managers_checks(self, managers, action):
+        """Run the checks of several managers at the same time.
+
+        Parameters
+        ----------
+        managers : list
+            The managers whose checks to run.
+        action : str
+            The action to perform.
+
+        Raises
+        ------
+        exceptions.KeyboardInterruption
+            Halt execution.
+        """
+        method = "_stream_packages" if self._stream else "_filter_packages"
+
+        if len(managers) == 1:
+            getattr(managers[0], method)(action)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=len(managers))
+        futures = [executor.submit(getattr(m, method), action) for m in managers]
+
+        try:
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            self._cancel_checks()
+            raise exceptions.KeyboardInterruption()
+        except BaseException:
+            self._cancel_checks()
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
+    def _cancel_checks(self):
+        """Stop the checks of all managers.
+        """
+        for m in self.managers:
+            m._kill_check_procs()
+
+    def _display_initial_report(self, action):
+        """Display initial report.
+
+        A report is displayed for each host.
+
+        Parameters
+        ----------
+        action : str
+            The action to perform.
+        """
+        for host, managers in self._hosts.items():
+            self._display_managers_report(managers, host if len(self._hosts) > 1 else None)
+
+        if self._reporter is not None:
+            for target, plan in self.get_plans(action):
+                self._reporter.plan(target, plan)
+
+            self._reporter.finish()
+
+    def get_plans(self, action):
+        """Get the result of the last executed checks of all managers.
+
+        Parameters
+        ----------
+        action : str
+            The action to perform.
+
+        Returns
+        -------
+        list
+            A tuple for each manager containing its target (see :any:`PackageManager.target`)
+            and its plan (see :any:`PackageManager.get_plan`) including the action.
+        """
+        plans = []
+
+        for m in self.managers:
+            plan = m.get_plan()
+            # Errors raised while loading the packages lists affect all managers.
+            plan["errors"] = self.errors.to_list() + plan["errors"]
+            plan["errors_dropped"] += self.errors.dropped
+            plans.append((m.target, dict(plan, action=action)))
+
+        return plans
+
+    def plan_packages(self, action):
+        """Run the checks without displaying a report nor handling packages.
+
+        Parameters
+        ----------
+        action : str
+            The action to plan.
+
+        Returns
+        -------
+        list
+            See :any:`get_plans`.
+        """
+        self._run_checks(action)
+
+        return self.get_plans(action)
+
+    def _display_managers_report(self, managers, host=None):
+        """Display the report of several managers.
+
+        Parameters
+        ----------
+        managers : list
+            The managers whose results to display.
+        host : str, None, optional
+            The host the managers handle packages on.
+        """
+        processed = []
+        non_existent_pkgs = []
+        existent_pkgs = []
+        not_installed_pkgs = []
+        installed_pkgs = []
+        timed_out_pkgs = []
+        failed_pkgs = []
+        pkgs_to_handle = {}
+        errors = error_records.ErrorLog()
+        errors.extend(self.errors)
+        multiple = len(self.managers) > 1
+
+        for m in managers:
+            pkgs_to_handle[m.name] = 0
+            errors.extend(m.errors)
+
+            for r in m.registry:
+                # Package names are only unique within an interface.
+                name = "%s%s%s" % (m.name, _interface_tag_sep, r.name) \
+                    if multiple else r.name
+                processed.append("%s (%s)" % (name, os.path.basename(r.source)))
+                pkgs_to_handle[m.name] += r.handle
+
+                if r.exists is not None:
+                    (existent_pkgs if r.exists else non_existent_pkgs).append(name)
+
+                if r.installed is not None:
+                    (installed_pkgs if r.installed else not_installed_pkgs).append(name)
+
+                if r.timed_out:
+                    timed_out_pkgs.append(name)
+
+                if r.failed:
+                    failed_pkgs.append(name)
+
+        self.log_details("Packages processed:", processed)
+
+        if self._ignore_exists_check:
+            non_existent = ""
+            existent = ""
+            self.log_details("Check for package existence ignored", [])
+        else:
+            non_existent = "- {} packages are NOT available on the software sources.\n".format(
+                len(non_existent_pkgs))
+            existent = "- {} packages are available on the software sources.\n".format(
+                len(existent_pkgs))
+
+            self.log_details("Packages non existent on software sources:", non_existent_pkgs)
+            self.log_details("Packages available on software sources", existent_pkgs)
+
+        if self._ignore_installed_check:
+            not_installed = ""
+            installed = ""
+            self.log_details("Check for package installed state ignored", [])
+        else:
+            not_installed = "- {} packages are NOT installed.\n".format(
+                len(not_installed_pkgs))
+            installed = "- {} packages are already installed.\n".format(
+                len(installed_pkgs))
+
+            self.log_details("Packages NOT installed:", not_installed_pkgs)
+            self.log_details("Packages installed:", installed_pkgs)
+
+        if timed_out_pkgs:
+            timed_out = "- {} packages couldn't be checked (the checks timed out).\n".format(
+                len(timed_out_pkgs))
+            self.log_details("Packages whose checks timed out:", timed_out_pkgs)
+        else:
+            timed_out = ""
+
+        if failed_pkgs:
+            failed = "- {} packages couldn't be checked (the check commands failed).\n".format(
+                len(failed_pkgs))
+            self.log_details("Packages whose check commands failed:", failed_pkgs)
+        else:
+            failed = ""
+
+        self.log_details("Errors raised while gathering package information:",
+                         [str(e) for e in errors] +
+                         (["(%d more errors)" % errors.dropped] if errors.dropped else []))
+
+        if len(managers) > 1:
+            pkgs_per_interface = "".join("\n- {}: {}".format(i, n)
+                                         for i, n in pkgs_to_handle.items())
+        else:
+            pkgs_per_interface = ""
+
+        getattr(self.logger, "warning" if len(errors) > 0 else "info")(_summary.format(
+            host=" (%s)" % host if host else "",
+            pkgs_list=len(processed),
+            non_existent=non_existent,
+            existent=existent,
+            not_installed=not_installed,
+            installed=installed,
+            timed_out=timed_out,
+            failed=failed,
+            errors=len(errors),
+            pkgs_to_handle=sum(pkgs_to_handle.values()),
+            pkgs_per_interface=pkgs_per_interface,
+            log_file=self.logger.get_log_file()
+        ))
+
+    def manage_packages(self, action):
+        """Manage packages.
+
+        Parameters
+        ----------
+        action : str
+            The action to perform.
+        """
+        if not action:
+            return
+
+        self._run_checks(action)
+        self._display_initial_report(action)
+
+        if self._stream:
+            return
+
+        # Package managers usually lock their databases. Run them one after the other.
+        for m in self.managers:
+            if len(self.managers) > 1:
+                self.logger.info("**Interface: %s**" % m.name)
+
+            m._perform_final_action(action)
+
+    def log_details(self, msg, plist):
+        """Log lists of packages.
+
+        Log complete the lists of packages, one per line, and do not display them in terminal.
+
+        Parameters
+        ----------
+        msg : str
+            Message
+        plist : list
+            Package list.
+        """
+        self.logger.info(msg + "\n" + ("\n".join(plist) if plist else "None"), term=False)
+
+
+def _get_command_chunks(base_cmd, pkgs, chunk_size=None, transport=None):
+    """Split packages into chunks that can be passed to a single command execution.
+
+    Parameters
+    ----------
+    base_cmd : list
+        The command without packages.
+    pkgs : list
+        The packages to split.
+    chunk_size : int, None, optional
+        Maximum amount of packages per chunk.
+    transport : transports.LocalTransport, None, optional
+        The transport used to execute the command. The running system if not set.
+
+    Returns
+    -------
+    list
+        List of lists of packages. The arguments of each chunk plus the command don't exceed the
+        arguments limit of the transport (see :any:`transports.LocalTransport.get_args_budget`).
+    """
+    transport = transport or transports.LocalTransport()
+    budget = transport.get_args_budget(base_cmd)
+    chunks = []
+    chunk = []
+    chunk_bytes = 0
+
+    for pkg in pkgs:
+        pkg_size = transport.get_arg_size(pkg)
+
+        if chunk and (chunk_bytes + pkg_size > budget or (chunk_size and len(chunk) >= chunk_size)):
+            chunks.append(chunk)
+            chunk = []
+            chunk_bytes = 0
+
+        chunk.append(pkg)
+        chunk_bytes += pkg_size
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def _kill_process_group(p):
+    """Kill a process started in its own process group and all its child processes.
+
+    Parameters
+    ----------
+    p : subprocess.Popen
+        The process to kill.
+    """
+    try:
+        os.killpg(p.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+    try:
+        p.communicate(timeout=_kill_grace)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def _validate(data, schema, file_path, schema_key, logger):
+    """Validate data loaded from a file.
+
+    Parameters
+    ----------
+    data : object
+        The data to validate.
+    schema : dict
+        JSON schema.
+    file_path : str
+        Path to the file the data was loaded from.
+    schema_key : str
+        Name of the variable/key the data was loaded from.
+    logger : LogSystem
+        The logger.
+    """
+    from .python_utils import json_schema_utils
+
+    if json_schema_utils.JSONSCHEMA_INSTALLED:
+        json_schema_utils.validate(
+            data, schema,
+            error_message_extra_info="\n".join([
+                "File: %s" % file_path,
+                "Data key: %s" % schema_key
+            ]),
+            logger=logger)
+
+
+def load_interface(name, logger=None):
+    """Load and validate an interface file.
+
+    The definition is kept in memory and reused while the modification time and size of the
+    interface file don't change.
+
+    Parameters
+    ----------
+    name : str
+        File name (no extension) of an interface file in **UserData/interfaces**.
+    logger : LogSystem, optional
+        The logger.
+
+    Returns
+    -------
+    dict
+        The interface definition.
+    """
+    interface_path = os.path.join(_paths_map["interfaces"], name + ".py")
+    stat = os.stat(interface_path)
+    key = [stat.st_mtime_ns, stat.st_size]
+    loaded = _loaded_interfaces.get(interface_path)
+
+    if loaded is not None and loaded[0] == key:
+        return loaded[1]
+
+    definition = run_path(interface_path)["interface"]
+    _validate(definition, interface_schema, interface_path, "interface", logger)
+    _loaded_interfaces[interface_path] = (key, definition)
+
+    return definition
+
+
+def _substitute_root(data, root):
+    """Replace the root placeholder in an interface definition.
+
+    Parameters
+    ----------
+    data : dict, list, str, object
+        An interface definition or a part of it.
+    root : str
+        The root directory of the target system.
+
+    Returns
+    -------
+    dict, list, str, object
+        A copy of the data with all the strings substituted.
+    """
+    if isinstance(data, str):
+        return data.replace(_root_placeholder, root)
+    elif isinstance(data, list):
+        return [_substitute_root(d, root) for d in data]
+    elif isinstance(data, dict):
+        return {k: _substitute_root(v, root) for k, v in data.items()}
+
+    return data
+
+
+def _load_packages_list(pkgs_path, logger):
+    """Load packages list.
+
+    The validated list of packages is stored in **UserData/cache/packages_lists** (and kept in
+    memory) and reused while the modification time and size of the packages list file don't
+    change.
+
+    Parameters
+    ----------
+    pkgs_path : str
+        Path to a packages list file.
+    logger : LogSystem
+        The logger.
+
+    Returns
+    -------
+    tuple
+        The list of packages and the name of the interface the packages list is meant for
+        (``None`` if not specified).
+    """
+    stat = os.stat(pkgs_path)
+    key = [pkgs_path, stat.st_mtime_ns, stat.st_size]
+    loaded = _loaded_packages_lists.get(pkgs_path)
+
+    if loaded is not None and loaded[0] == key:
+        return loaded[1]
+
+    cache_file = os.path.join(_paths_map["cache"], "packages_lists",
+                              hashlib.md5(pkgs_path.encode("utf-8")).hexdigest() + ".json")
+
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+
+        if cached["key"] == key:
+            _loaded_packages_lists[pkgs_path] = (key, (cached["packages"], cached["interface"]))
+
+            return cached["packages"], cached["interface"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    pkgs_list, interface = _read_packages_list(pkgs_path)
+    _validate(pkgs_list, packages_schema, pkgs_path, "packages", logger)
+    _loaded_packages_lists[pkgs_path] = (key, (pkgs_list, interface))
+
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = cache_file + ".tmp"
+
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "packages": pkgs_list, "interface": interface}, f)
+
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+    return pkgs_list, interface
+
+
+def load_packages_lists(pkgs_list_relative=[], pkgs_list_absolute=[], interfaces=[],
+                        logger=None):
+    """Load packages lists and route their packages to interfaces.
+
+    A packages list can be meant for a specific interface (see :any:`_read_packages_list`) and a
+    single entry of a packages list can be prefixed with an interface name followed by ``::``
+    (e.g. ``flatpak::org.gimp.GIMP``). Packages without an interface are handled by the first
+    interface. Packages meant for an interface that isn't being used are ignored.
+
+    Parameters
+    ----------
+    pkgs_list_relative : list, optional
+        List of names of file that can be found inside **UserData/packages_lists**.
+    pkgs_list_absolute : list, optional
+        List of paths to files.
+    interfaces : list, optional
+        Names of the interfaces in use.
+    logger : LogSystem, optional
+        The logger.
+
+    Returns
+    -------
+    tuple
+        A dictionary mapping each interface name to a list of tuples containing the path to a
+        packages list file and the packages from that file routed to the interface, the amount of
+        ignored packages and the errors raised while loading the files (an
+        :any:`error_records.ErrorLog`).
+    """
+    pkgs_paths = [_get_packages_list_path(p) for p in pkgs_list_relative]
+    pkgs_paths.extend(os.path.abspath(file_utils.expand_path(p)) for p in pkgs_list_absolute)
+    routed = {i: [] for i in interfaces}
+    ignored = 0
+    errors = error_records.ErrorLog()
+
+    for pkgs_path in pkgs_paths:
+        try:
+            pkgs_list, list_interface = _load_packages_list(pkgs_path, logger)
+        except Exception as err:
+            errors.add(str(err), action="load_list")
+            continue
+
+        default_interface = list_interface or interfaces[0]
+        per_interface = {}
+
+        for entry in pkgs_list:
+            if _interface_tag_sep in entry:
+                interface, pkg = entry.split(_interface_tag_sep, 1)
+            else:
+                interface, pkg = default_interface, entry
+
+            per_interface.setdefault(interface, []).append(pkg)
+
+        for interface, pkgs in per_interface.items():
+            if interface in routed:
+                routed[interface].append((pkgs_path, pkgs))
+            else:
+                ignored += len(pkgs)
+
+    return routed, ignored, errors
+
+
+def _get_packages_list_path(name):
+    """Get the path to a packages list stored in **UserData/packages_lists**.
+
+    Parameters
+    ----------
+    name : str
+        A file name. If it has no packages list file extension, the first existent file with one
+        of them is used (in the order defined in ``_packages_list_extensions``).
+
+    Returns
+    -------
+    str
+        The path to the packages list file.
+    """
+    if os.path.splitext(name)[1] in _packages_list_extensions:
+        return os.path.join(_paths_map["packages_lists"], name)
+
+    for ext in _packages_list_extensions:
+        pkgs_path = os.path.join(_paths_map["packages_lists"], name + ext)
+
+        if os.path.isfile(pkgs_path):
+            return pkgs_path
+
+    return os.path.join(_paths_map["packages_lists"], name + ".py")
+
+
+def _read_packages_list(pkgs_path):
+    """Read packages list.
+
+    The file format is chosen by the file extension.
+
+    - ``.py``: A Python file that defines a ``packages`` variable and optionally an ``interface``
+      variable.
+    - ``.txt``: One package name per line. Empty lines and anything after a ``#`` are ignored,
+      except for a ``# interface: <name>`` line.
+    - ``.json``, ``.yaml``, ``.yml``: A list of package names or a mapping with a ``packages`` key
+      containing a list of package names and optionally an ``interface`` key.
+
+    Parameters
+    ----------
+    pkgs_path : str
+        Path to a packages list file.
+
+    Returns
+    -------
+    tuple
+        The list of packages and the name of the interface the packages list is meant for
+        (``None`` if not specified).
+    """
+    ext = os.path.splitext(pkgs_path)[1]
+
+    if ext == ".txt":
+        pkgs_list = []
+        interface = None
+
+        with open(pkgs_path, "r", encoding="utf-8") as f:
+            for line in f:
+                pkg, sep, comment = line.partition("#")
+                pkg = pkg.strip()
+
+                if pkg:
+                    pkgs_list.append(pkg)
+                elif interface is None:
+                    match = _txt_interface_re.match(comment)
+
+                    if match is not None:
+                        interface = match.group(1)
+
+        return pkgs_list, interface
+    elif ext in (".json", ".yaml", ".yml"):
+        with open(pkgs_path, "r", encoding="utf-8") as f:
+            if ext == ".json":
+                data = json.load(f)
+            else:
+                from .python_utils import yaml_utils
+
+                data = yaml_utils.load(f)
+
+        if isinstance(data, dict):
+            return data["packages"], data.get("interface")
+
+        return data, None
+
+    data = run_path(pkgs_path)
+
+    return data["packages"], data.get("interface")
+
+
+def _get_output_parser(definition):
+    """Get output parser.
+
+    Parameters
+    ----------
+    definition : dict
+        A command definition containing the ``parser``, ``pattern`` and/or ``passed_status`` keys.
+
+    Returns
+    -------
+    dict
+        The compiled regular expression used to parse each line of a command output and the set of
+        status values that mark a package as passing a check.
+    """
+    return {
+        "regex": re.compile(definition.get("pattern",
+                                           _output_parsers[definition.get("parser", "first_word")])),
+        "passed_status": set(definition.get("passed_status", []))
+    }
+
+
+def _parse_output(output, parser):
+    """Parse the output of a command that reports the state of several packages.
+
+    Parameters
+    ----------
+    output : bytes
+        The command output.
+    parser : dict
+        See :any:`_get_output_parser`.
+
+    Yields
+    ------
+    tuple
+        A package name and if the package passed the check.
+    """
+    regex = parser["regex"]
+    check_status = bool(parser["passed_status"]) and "status" in regex.groupindex
+
+    for line in output.decode("utf-8", "replace").splitlines():
+        match = regex.match(line)
 
-    for f in list_of_files:
-        name, ext = os.path.splitext(f)
+        if match is None:
+            continue
 
-        if ext == ".py":
-            print(name)
+        yield (match.group("pkg"),
+               match.group("status") in parser["passed_status"] if check_status else True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""Persistent storage of package check results.
+
+Attributes
+----------
+default_ttl : int
+    Default amount of seconds a stored check result is considered valid.
+"""
+import json
+import os
+import time
+
+default_ttl = 3600
+
+
+def get_fingerprint(paths):
+    """Get the current state of several paths.
+
+    Parameters
+    ----------
+    paths : list
+        Paths to files or directories.
+
+    Returns
+    -------
+    list
+        The path, modification time and size of each path. Missing paths have their modification
+        time and size set to ``None``.
+    """
+    fingerprint = []
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append([path, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            fingerprint.append([path, None, None])
+
+    return fingerprint
+
+
+class CheckCache():
+    """Storage of package check results for a single interface.
+
+    The stored results are discarded when any of the *fingerprint* paths changes (their modification
+    time or size) and each stored result expires after a certain amount of time.
+
+    Attributes
+    ----------
+    cache_file : str
+        Path to the file in which the results are stored.
+    fingerprint_paths : list
+        Paths to files or directories whose changes invalidate the stored results.
+    ttl : int
+        Amount of seconds a stored result is considered valid.
+    """
+
+    def __init__(self, cache_dir, interface_name, fingerprint_paths=[], ttl=default_ttl,
+                 refresh=False):
+        """
+        Parameters
+        ----------
+        cache_dir : str
+            Directory in which to store the results.
+        interface_name : str
+            The name of the interface the results belong to.
+        fingerprint_paths : list, optional
+            Paths to files or directories whose changes invalidate the stored results.
+        ttl : int, optional
+            Amount of seconds a stored result is considered valid.
+        refresh : bool, optional
+            Ignore the stored results. They will be overwritten when saving.
+        """
+        self.cache_file = os.path.join(cache_dir, "checks", interface_name + ".json")
+        self.fingerprint_paths = fingerprint_paths
+        self.ttl = ttl
+        self._fingerprint = self._get_fingerprint()
+        self._results = {} if refresh else self._load()
+        self._modified = False
+
+    def _get_fingerprint(self):
+        """Get the current state of the fingerprint paths.
+
+        Returns
+        -------
+        list
+            See :any:`get_fingerprint`.
+        """
+        return get_fingerprint(self.fingerprint_paths)
+
+    def _load(self):
+        """Load stored results.
+
+        Returns
+        -------
+        dict
+            The stored results. Empty if there are no stored results or if they were stored with a
+            different fingerprint.
+        """
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("fingerprint") != self._fingerprint:
+            return {}
+
+        return data.get("results", {})
+
+    def refresh_fingerprint(self):
+        """Discard the results if any of the fingerprint paths changed.
+
+        Used by instances kept in memory between runs (see :any:`server.PlanServer`).
+
+        Returns
+        -------
+        bool
+            If the results were discarded.
+        """
+        fingerprint = self._get_fingerprint()
+
+        if fingerprint == self._fingerprint:
+            return False
+
+        self._fingerprint = fingerprint
+        self._results = {}
+        self._modified = False
+
+        return True
+
+    def get(self, action, pkg):
+        """Get a stored check result.
+
+        Parameters
+        ----------
+        action : str
+            The check action.
+        pkg : str
+            The name of a package.
+
+        Returns
+        -------
+        bool, None
+            The stored result. ``None`` if there is no stored result or if it expired.
+        """
+        result = self._results.get(action, {}).get(pkg)
+
+        if result is None or time.time() - result[1] > self.ttl:
+            return None
+
+        return result[0]
+
+    def set(self, action, pkg, check_passed):
+        """Store a check result.
+
+        Parameters
+        ----------
+        action : str
+            The check action.
+        pkg : str
+            The name of a package.
+        check_passed : bool
+            If the check passed.
+        """
+        self._results.setdefault(action, {})[pkg] = [check_passed, int(time.time())]
+        self._modified = True
+
+    def clear(self):
+        """Discard all stored results.
+        """
+        self._results = {}
+        self._modified = False
+
+        try:
+            os.remove(self.cache_file)
+        except OSError:
+            pass
+
+    def save(self):
+        """Write the results to disk.
+        """
+        if not self._modified:
+            return
+
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+
+        with open(tmp_file, "w", encoding="utf-8") as cache_file:
+            json.dump({
+                "fingerprint": self._fingerprint,
+                "results": self._results
+            }, cache_file)
+
+        os.replace(tmp_file, self.cache_file)
+        self._modified = False
+
+
+class CheckJournal():
+    """Append-only record of the package check results of a run.
+
+    It allows to resume an interrupted run without checking again the packages that were already
+    checked. Each line of the journal file contains a check action, the check result (``1`` or
+    ``0``) and a package name separated by tabs.
+
+    Attributes
+    ----------
+    journal_file : str
+        Path to the journal file.
+    """
+
+    def __init__(self, journal_dir, interface_name, resume=False):
+        """
+        Parameters
+        ----------
+        journal_dir : str
+            Directory in which to store the journal.
+        interface_name : str
+            The name of the interface the results belong to.
+        resume : bool, optional
+            Replay the existent journal and keep appending to it. Otherwise, the existent journal
+            is discarded.
+        """
+        self.journal_file = os.path.join(journal_dir, interface_name + ".tsv")
+        self._results = self._replay() if resume else {}
+
+        os.makedirs(journal_dir, exist_ok=True)
+        self._file = open(self.journal_file, "a" if resume else "w", encoding="utf-8")
+
+    def __len__(self):
+        return sum(len(r) for r in self._results.values())
+
+    def _replay(self):
+        """Read the existent journal.
+
+        Returns
+        -------
+        dict
+            The recorded results. Malformed lines (e.g. a last line written partially) are ignored.
+        """
+        results = {}
+
+        try:
+            with open(self.journal_file, "r", encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    if not line.endswith("\n"):
+                        continue
+
+                    try:
+                        action, check_passed, pkg = line.rstrip("\n").split("\t")
+                    except ValueError:
+                        continue
+
+                    results.setdefault(action, {})[pkg] = check_passed == "1"
+        except OSError:
+            pass
+
+        return results
+
+    def get(self, action, pkg):
+        """Get a recorded check result.
+
+        Parameters
+        ----------
+        action : str
+            The check action.
+        pkg : str
+            The name of a package.
+
+        Returns
+        -------
+        bool, None
+            The recorded result. ``None`` if there is no recorded result.
+        """
+        return self._results.get(action, {}).get(pkg)
+
+    def record(self, action, pkg, check_passed):
+        """Append a check result to the journal.
+
+        Parameters
+        ----------
+        action : str
+            The check action.
+        pkg : str
+            The name of a package.
+        check_passed : bool
+            If the check passed.
+        """
+        self._file.write("%s\t%d\t%s\n" % (action, check_passed, pkg))
+
+    def flush(self):
+        """Write the recorded results to disk.
+        """
+        self._file.flush()
+
+    def close(self, remove=False):
+        """Close the journal.
+
+        Parameters
+        ----------
+        remove : bool, optional
+            Remove the journal file. Used when a run finished and there is nothing to resume.
+        """
+        self._file.close()
+
+        if remove:
+            try:
+                os.remove(self.journal_file)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    pass
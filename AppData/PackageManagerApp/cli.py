@@ -10,18 +10,24 @@ root_folder : str
     without exceptions.
 """
 
+import json
 import os
 import sys
 
-from . import app_utils
+from collections import OrderedDict
+
+from . import config_files
+from . import reports
 from .__init__ import __appdescription__
 from .__init__ import __appname__
 from .__init__ import __status__
 from .__init__ import __version__
 from .python_utils import cli_utils
+from .python_utils import exceptions
+
+root_folder = config_files.root_folder
 
-root_folder = os.path.realpath(os.path.abspath(os.path.join(
-    os.path.normpath(os.getcwd()))))
+_flag_file = config_files.flag_file
 
 docopt_doc = """{appname} {version} ({status})
 
@@ -30,13 +36,33 @@ docopt_doc = """{appname} {version} ({status})
 Usage:
     app.py (-h | --help | --manual | --version)
     app.py (install | remove)
-           (-i <file> | --interface=<file>)
+           (-i <file> | --interface=<file>)...
            (-l <file>... | --list-relative=<file>...
            | -L <path>... | --list-absolute=<path>...)
            [-l <file>... | --list-relative=<file>...
            | -L <path>... | --list-absolute=<path>...]
            [--ignore-exists-check]
            [--ignore-installed-check]
+           [-j <jobs> | --jobs=<jobs>]
+           [--no-cache | --refresh-cache]
+           [--stream]
+           [--resume]
+           [--root=<path>...]
+           [--host=<host>... [--max-hosts=<hosts>]]
+           [--report-format=<format>]
+    app.py plan (install | remove)
+           (-i <file> | --interface=<file>)...
+           (-l <file>... | --list-relative=<file>...
+           | -L <path>... | --list-absolute=<path>...)
+           [-l <file>... | --list-relative=<file>...
+           | -L <path>... | --list-absolute=<path>...]
+           [--ignore-exists-check]
+           [--ignore-installed-check]
+           [-j <jobs> | --jobs=<jobs>]
+           [--root=<path>...]
+           [--host=<host>... [--max-hosts=<hosts>]]
+           [--socket=<path>]
+    app.py serve [--socket=<path>]
     app.py generate system_executable
     app.py (print_packages_lists | print_interfaces)
 
@@ -54,16 +80,27 @@ Options:
 -i <file>, --interface=<file>
     File name (no extension) of an existent file in
     **UserData/interfaces/<file>.py** that contains the commands that will
-    actually be used to handle packages.
+    actually be used to handle packages. It can be specified more than once
+    to handle packages with several interfaces at once. Packages are routed
+    to an interface by an **interface** key/variable in a packages list or
+    by prefixing a packages list entry with the interface name followed by
+    **::** (e.g. **flatpak::org.gimp.GIMP**). Untagged packages are handled
+    by the first interface.
 
 -l <file>, --list-relative=<file>
-    File name (no extension) of an existent file in
-    **UserData/packages_lists/<file>.py** that contains a list of packages and
-    that will be used with the **install**/**remove** commands.
+    File name of an existent file in **UserData/packages_lists** that contains
+    a list of packages and that will be used with the **install**/**remove**
+    commands. If no extension is specified, the first existent file with one
+    of the **.py**, **.txt**, **.json**, **.yaml** or **.yml** extensions
+    is used.
 
 -L <path>, --list-absolute=<path>
     Full path to a file containing the list of packages that will be used
-    with the **install**/**remove** commands.
+    with the **install**/**remove** commands. The file format is chosen by
+    its extension. **.py** files define a **packages** variable. **.txt**
+    files contain one package per line (**#** starts a comment). **.json**
+    and **.yaml**/**.yml** files contain a list of packages or a mapping
+    with a **packages** key.
 
 --ignore-exists-check
     Ignore the check for package existence.
@@ -71,6 +108,73 @@ Options:
 --ignore-installed-check
     Ignore the check for package installed.
 
+-j <jobs>, --jobs=<jobs>
+    Maximum number of package checks to run concurrently [default: 1].
+
+--no-cache
+    Do not use nor store package check results.
+
+--refresh-cache
+    Ignore the stored package check results and store new ones.
+
+--stream
+    Install/remove packages while the rest are still being checked. No
+    confirmation is asked and the install/remove command output is only
+    written to the log file, so the interface command must not be
+    interactive (e.g. **apt-get -y**).
+
+--resume
+    Reuse the package check results recorded by a previous interrupted run
+    that used the same interface and only check the remaining packages.
+
+--root=<path>
+    Root directory of a system other than the running one (e.g. a chroot or
+    a container image). It replaces the **{{root}}** placeholder in the
+    interface commands (e.g. **dpkg --root={{root}}**, **apt-get -o
+    Dir={{root}}**). It can be specified more than once to check all the
+    systems at the same time. When handling packages on other hosts, it
+    must be an absolute path on those hosts.
+
+--host=<host>
+    Handle packages on another host. **<host>** is an SSH destination (e.g.
+    **user@example.com** or **ssh:user@example.com**), **local** for the
+    running system or **fake:<name>** for a local system pretending to be
+    the host **<name>** (for testing). It can be specified more than once.
+    Each host gets its own report. The checks on remote hosts should use
+    the **batch** mode or the **list_installed**/**list_available**
+    commands of the interfaces.
+
+--max-hosts=<hosts>
+    Maximum number of hosts to handle at the same time [default: 4].
+
+--report-format=<format>
+    Format of the report written to the standard output. **text**, the
+    human readable output, **json**, a single JSON object written once all
+    packages are checked or **ndjson**, one JSON object per line written as
+    soon as each package is checked followed by a **plan** object for each
+    interface (packages to handle, check timings and errors). With the
+    **json** and **ndjson** formats, everything else is written to the
+    standard error [default: text].
+
+--socket=<path>
+    Path to the Unix socket of the planning server. If not specified,
+    **UserData/server.sock** is used.
+
+Commands:
+
+plan
+    Ask a planning server for the packages that would be installed/removed
+    and print its answer as JSON. Nothing is installed/removed. The server
+    runs the checks with the interfaces, packages lists and check results
+    it keeps in memory, so repeated planning requests are fast.
+
+serve
+    Start a planning server. It keeps the interfaces, the packages lists
+    and the check results of the interfaces that define a **cache** in
+    memory. They are reloaded when their files or the package databases
+    (the **fingerprint_paths** of the cache) change. Stop it with
+    **Ctrl+C**.
+
 """.format(appname=__appname__,
            appdescription=__appdescription__,
            version=__version__,
@@ -89,10 +193,15 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
     action : method
         Set the method that will be executed when calling CommandLineTool.run().
     package_manager : class
-        See :any:`app_utils.PackageManager`.
+        See :any:`app_utils.PackageManagerGroup`.
+    plan_request : dict
+        The request sent to a planning server by the **plan** command.
+    reporter : reports.Reporter, None
+        Writer of the machine readable report.
     """
     action = None
     package_manager = None
+    plan_request = None
 
     def __init__(self, docopt_args):
         """
@@ -102,10 +211,27 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
             The dictionary of arguments as returned by docopt parser.
         """
         self.a = docopt_args
+        self.reporter = None
+
+        if self.a["--report-format"] not in reports.report_formats:
+            raise exceptions.WrongValueForOption(
+                "--report-format must be one of: %s. Value passed: %s" %
+                (", ".join(reports.report_formats), self.a["--report-format"]))
+
+        if any([self.a["install"], self.a["remove"]]) and not self.a["plan"] and \
+                self.a["--report-format"] != "text":
+            # Keep the standard output for the report. Everything else, including the output of
+            # the executed commands, goes to the standard error.
+            sys.stdout.flush()
+            report_stream = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+            os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+            self.reporter = reports.Reporter(report_stream, self.a["--report-format"])
+
         self._cli_header_blacklist = [
             self.a["--manual"],
             self.a["print_packages_lists"],
-            self.a["print_interfaces"]
+            self.a["print_interfaces"],
+            self.a["plan"]
         ]
         self._inhibit_logger_list = self._cli_header_blacklist
 
@@ -121,20 +247,98 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
             if self.a["system_executable"]:
                 self.logger.info("**System executable generation...**")
                 self.action = self.system_executable_generation
+        elif self.a["plan"]:
+            self.plan_request = dict(self._get_checks_options(),
+                                     command="plan",
+                                     action="install" if self.a["install"] else "remove")
+            self.action = self.plan
+        elif self.a["serve"]:
+            self.action = self.serve
         elif any([self.a["install"], self.a["remove"]]):
-            self.package_manager = app_utils.PackageManager(
-                interface=self.a["--interface"],
-                # De-duplication. docopt workaround.
-                pkgs_list_relative=list(set(self.a["--list-relative"])),
-                # De-duplication. docopt workaround.
-                pkgs_list_absolute=list(set(self.a["--list-absolute"])),
-                ignore_exists_check=self.a["--ignore-exists-check"],
-                ignore_installed_check=self.a["--ignore-installed-check"],
-                logger=self.logger
+            from . import app_utils
+
+            self.package_manager = app_utils.PackageManagerGroup(
+                use_cache=not self.a["--no-cache"],
+                refresh_cache=self.a["--refresh-cache"],
+                stream=self.a["--stream"],
+                resume=self.a["--resume"],
+                reporter=self.reporter,
+                logger=self.logger,
+                **self._get_checks_options()
             )
 
             self.action = self.manage_packages
 
+    def _get_checks_options(self):
+        """Get the validated options of the package checks.
+
+        Returns
+        -------
+        dict
+            Keyword arguments for :any:`app_utils.PackageManagerGroup`.
+
+        Raises
+        ------
+        exceptions.WrongValueForOption
+            If an option has an invalid value.
+        """
+        try:
+            jobs = int(self.a["--jobs"])
+        except ValueError:
+            jobs = 0
+
+        if jobs < 1:
+            raise exceptions.WrongValueForOption(
+                "--jobs must be a positive integer. Value passed: %s" % self.a["--jobs"])
+
+        try:
+            max_hosts = int(self.a["--max-hosts"])
+        except ValueError:
+            max_hosts = 0
+
+        if max_hosts < 1:
+            raise exceptions.WrongValueForOption(
+                "--max-hosts must be a positive integer. Value passed: %s" %
+                self.a["--max-hosts"])
+
+        from . import transports
+
+        # De-duplication. docopt workaround.
+        hosts = list(OrderedDict.fromkeys(self.a["--host"]))
+
+        # The root directories of other hosts can't be expanded nor checked locally.
+        if any(not transports.get_transport(h).is_local for h in hosts):
+            roots = list(OrderedDict.fromkeys(os.path.normpath(r) for r in self.a["--root"]))
+
+            for r in roots:
+                if not os.path.isabs(r):
+                    raise exceptions.WrongValueForOption(
+                        "--root must be an absolute path when handling packages on other hosts. "
+                        "Value passed: %s" % r)
+        else:
+            roots = list(OrderedDict.fromkeys(
+                os.path.abspath(os.path.expanduser(r)) for r in self.a["--root"]))
+
+            for r in roots:
+                if not os.path.isdir(r):
+                    raise exceptions.WrongValueForOption(
+                        "--root must be an existent directory. Value passed: %s" % r)
+
+        return {
+            # De-duplication. docopt workaround.
+            "interfaces": list(OrderedDict.fromkeys(self.a["--interface"])),
+            # De-duplication. docopt workaround.
+            "pkgs_list_relative": list(OrderedDict.fromkeys(self.a["--list-relative"])),
+            # De-duplication. docopt workaround.
+            "pkgs_list_absolute": list(OrderedDict.fromkeys(self.a["--list-absolute"])),
+            "ignore_exists_check": self.a["--ignore-exists-check"],
+            "ignore_installed_check": self.a["--ignore-installed-check"],
+            "jobs": jobs,
+            "roots": roots,
+            "hosts": hosts,
+            "max_hosts": max_hosts
+        }
+
     def run(self):
         """Execute the assigned action stored in self.action if any.
         """
@@ -144,22 +348,65 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
             sys.exit(0)
 
     def print_packages_lists(self):
-        """See :any:`PackageManagerApp.app_utils.print_config_files_list`.
+        """See :any:`PackageManagerApp.config_files.print_config_files_list`.
         """
-        app_utils.print_config_files_list("packages_lists")
+        config_files.print_config_files_list("packages_lists")
 
     def print_interfaces(self):
-        """See :any:`PackageManagerApp.app_utils.print_config_files_list`.
+        """See :any:`PackageManagerApp.config_files.print_config_files_list`.
         """
-        app_utils.print_config_files_list("interfaces")
+        config_files.print_config_files_list("interfaces")
 
     def manage_packages(self):
-        """See :any:`app_utils.PackageManager.manage_packages`.
+        """See :any:`app_utils.PackageManagerGroup.manage_packages`.
         """
         self.package_manager.manage_packages(
             "install" if self.a["install"] else "remove" if self.a["remove"] else None
         )
 
+    def plan(self):
+        """Ask a planning server for the packages to handle and print its answer as JSON.
+
+        Raises
+        ------
+        exceptions.ExceptionWhitoutTraceBack
+            If the server can't be reached.
+        SystemExit
+            If the server couldn't answer.
+        """
+        from . import server
+
+        socket_path = self.a["--socket"] or server.default_socket_path
+
+        try:
+            response = server.send_request(self.plan_request, socket_path)
+        except (OSError, ValueError) as err:
+            raise exceptions.ExceptionWhitoutTraceBack(
+                "Couldn't get an answer from the server at %s (start it with **app.py serve**): "
+                "%s" % (socket_path, err))
+
+        if response.get("status") != "ok":
+            # The message might be already formatted by an exception raised on the server.
+            sys.exit(response.get("message"))
+
+        print(json.dumps({"plans": response["plans"]}, indent=4))
+
+    def serve(self):
+        """See :any:`server.PlanServer`.
+        """
+        from . import server
+
+        plan_server = server.PlanServer(self.a["--socket"] or server.default_socket_path,
+                                        logger=self.logger)
+        self.logger.info("**Listening on %s**" % plan_server.socket_path)
+
+        try:
+            plan_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            plan_server.server_close()
+
     def system_executable_generation(self):
         """See :any:`cli_utils.CommandLineInterfaceSuper._system_executable_generation`.
         """
@@ -182,12 +429,24 @@ class CommandLineInterface(cli_utils.CommandLineInterfaceSuper):
 def main():
     """Initialize command line interface.
     """
-    cli_utils.run_cli(flag_file=".package-manager.flag",
+    # Normally already done by app.py, before importing this module.
+    if config_files.run_completion_command(sys.argv):
+        return
+
+    if os.path.exists(_flag_file):
+        try:
+            config_files.update_completion_index()
+        except OSError:
+            # The Bash completions fall back to the print_* commands.
+            pass
+
+    cli_utils.run_cli(flag_file=_flag_file,
                       docopt_doc=docopt_doc,
                       app_name=__appname__,
                       app_version=__version__,
                       app_status=__status__,
-                      cli_class=CommandLineInterface)
+                      cli_class=CommandLineInterface,
+                      docopt_cache_dir=os.path.join(config_files.paths_map["cache"], "docopt"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Locations of the configuration files.
+
+Kept free of heavy imports. The listing of configuration files is executed by the Bash completions
+on every TAB press.
+
+Attributes
+----------
+completion_commands : dict
+    Commands executed by the Bash completions and the type of configuration files they list.
+completion_index_file : str
+    Path to the file listing the names of the configuration files. It is read directly by the Bash
+    completions and regenerated when the configuration files directories change.
+flag_file : str
+    Name of the file that marks the application folder. All commands must be executed from the
+    folder containing it.
+packages_list_extensions : tuple
+    Supported packages list file extensions. In order of precedence.
+paths_map : dict
+    Storage locations of the configuration files, cache files and journals.
+root_folder : str
+    The main folder containing the application. All commands must be executed from this location
+    without exceptions.
+"""
+import os
+
+root_folder = os.path.realpath(os.path.abspath(os.path.join(
+    os.path.normpath(os.getcwd()))))
+
+paths_map = {
+    "packages_lists": os.path.join(root_folder, "UserData", "packages_lists"),
+    "interfaces": os.path.join(root_folder, "UserData", "interfaces"),
+    "cache": os.path.join(root_folder, "UserData", "cache"),
+    "journals": os.path.join(root_folder, "UserData", "journals")
+}
+
+packages_list_extensions = (
+    ".py",
+    ".txt",
+    ".json",
+    ".yaml",
+    ".yml"
+)
+
+completion_index_file = os.path.join(paths_map["cache"], "completion_index")
+
+flag_file = ".package-manager.flag"
+
+completion_commands = {
+    "print_packages_lists": "packages_lists",
+    "print_interfaces": "interfaces"
+}
+
+# Configuration files listed in the completion index.
+_indexed_file_types = ("interfaces", "packages_lists")
+
+
+def get_config_files_list(file_type):
+    """Get config files list.
+
+    Parameters
+    ----------
+    file_type : str
+        One of "packages_lists" or "interfaces".
+
+    Returns
+    -------
+    list
+        The sorted names (without extension) of the configuration files.
+    """
+    # FUTURE:
+    # Use context manager with os.scandir().
+    list_of_files = [entry.name for entry in os.scandir(paths_map[file_type]) if
+                     entry.is_file(follow_symlinks=False)]
+    extensions = packages_list_extensions if file_type == "packages_lists" else (".py",)
+    names = []
+
+    for f in sorted(list_of_files):
+        name, ext = os.path.splitext(f)
+
+        if ext in extensions and name not in names:
+            names.append(name)
+
+    return names
+
+
+def print_config_files_list(file_type):
+    """Print config files list.
+
+    Used to print to standard output the list of configuration files (either "packages_lists" or
+    "interfaces" configuration files). The output is used only by the Bash completions script.
+
+    Parameters
+    ----------
+    file_type : str
+        One of "packages_lists" or "interfaces".
+    """
+    for name in get_config_files_list(file_type):
+        print(name)
+
+
+def update_completion_index():
+    """Regenerate the completion index if it is outdated.
+
+    The index is outdated if it doesn't exist or if any of the configuration files directories was
+    modified after it was written (the same check that the Bash completions perform). Each line of
+    the index contains a configuration file type followed by the space separated names of the
+    configuration files of that type.
+
+    Returns
+    -------
+    bool
+        If the index was regenerated.
+    """
+    dirs_mtime = max(os.stat(paths_map[t]).st_mtime_ns for t in _indexed_file_types)
+
+    try:
+        if os.stat(completion_index_file).st_mtime_ns >= dirs_mtime:
+            return False
+    except OSError:
+        pass
+
+    lines = ["%s %s\n" % (t, " ".join(get_config_files_list(t))) for t in _indexed_file_types]
+
+    os.makedirs(os.path.dirname(completion_index_file), exist_ok=True)
+    tmp_file = "%s.%d.tmp" % (completion_index_file, os.getpid())
+
+    with open(tmp_file, "w", encoding="utf-8") as index_file:
+        index_file.writelines(lines)
+
+    # The index takes the modification time of the directories read before listing them. Changes
+    # made while listing them make the directories newer and the index outdated.
+    os.utime(tmp_file, ns=(dirs_mtime, dirs_mtime))
+    os.replace(tmp_file, completion_index_file)
+
+    return True
+
+
+def run_completion_command(argv):
+    """Run a command executed by the Bash completions.
+
+    Called before importing the rest of the application. The completion commands don't need the
+    arguments parser nor the logger.
+
+    Parameters
+    ----------
+    argv : list
+        The command line arguments (including the program name).
+
+    Returns
+    -------
+    bool
+        If the arguments were a completion command and it was run. Any other arguments must be
+        handled by :any:`cli.main`.
+    """
+    if len(argv) != 2 or argv[1] not in completion_commands or not os.path.exists(flag_file):
+        return False
+
+    try:
+        update_completion_index()
+    except OSError:
+        # The Bash completions fall back to the print_* commands.
+        pass
+
+    print_config_files_list(completion_commands[argv[1]])
+
+    return True
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Error records.
+
+Attributes
+----------
+max_output_size : int
+    Maximum amount of characters of a command output kept in an error record.
+max_records : int
+    Maximum amount of error records kept by an :any:`ErrorLog`. Further errors are only counted.
+"""
+import threading
+
+max_output_size = 1024
+max_records = 1000
+
+
+class ErrorRecord():
+    """Error record.
+
+    Attributes
+    ----------
+    action : str, None
+        The action that failed (e.g. ``exists``, ``install``, ``list_installed``).
+    duration : float, None
+        Seconds the failed command ran.
+    message : str
+        Description of the error.
+    output : str, None
+        The last characters of the error output of the failed command.
+    package : str, None
+        The package being handled. ``None`` if the error isn't related to a single package.
+    returncode : int, None
+        The exit status of the failed command.
+    """
+    __slots__ = (
+        "action",
+        "duration",
+        "message",
+        "output",
+        "package",
+        "returncode",
+    )
+
+    def __init__(self, message, package=None, action=None, returncode=None, output=None,
+                 duration=None):
+        """
+        Parameters
+        ----------
+        message : str
+            Description of the error.
+        package : str, None, optional
+            The package being handled.
+        action : str, None, optional
+            The action that failed.
+        returncode : int, None, optional
+            The exit status of the failed command.
+        output : bytes, str, None, optional
+            The error output of the failed command. Only its last characters are kept.
+        duration : float, None, optional
+            Seconds the failed command ran.
+        """
+        if isinstance(output, bytes):
+            output = output[-max_output_size * 4:].decode("utf-8", "replace")
+
+        if output is not None:
+            output = output.strip()[-max_output_size:] or None
+
+        self.message = message
+        self.package = package
+        self.action = action
+        self.returncode = returncode
+        self.output = output
+        self.duration = duration
+
+    def __str__(self):
+        text = self.message
+
+        if self.action is not None:
+            text = "%s%s: %s" % (self.action, "" if self.package is None else " " + self.package,
+                                 text)
+
+        if self.returncode is not None:
+            text += " (return code: %s)" % self.returncode
+
+        if self.output:
+            text += "\n    " + self.output.replace("\n", "\n    ")
+
+        return text
+
+    def to_dict(self):
+        """Get the record as a dictionary.
+
+        Returns
+        -------
+        dict
+            The record attributes.
+        """
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class ErrorLog():
+    """Bounded storage of error records.
+
+    Only the first records are kept. The rest are just counted. Records can be added from several
+    threads.
+    """
+
+    def __init__(self):
+        self._records = []
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(list(self._records))
+
+    @property
+    def dropped(self):
+        """int: Amount of errors that weren't kept.
+        """
+        return self._count - len(self._records)
+
+    def add(self, message, **kwargs):
+        """Add an error.
+
+        Parameters
+        ----------
+        message : str
+            Description of the error.
+        **kwargs
+            See :any:`ErrorRecord`.
+        """
+        with self._lock:
+            self._count += 1
+
+            if len(self._records) < max_records:
+                self._records.append(ErrorRecord(message, **kwargs))
+
+    def extend(self, error_log):
+        """Add the errors of another error log.
+
+        Parameters
+        ----------
+        error_log : ErrorLog
+            The error log whose errors to add.
+        """
+        with self._lock:
+            for r in error_log:
+                if len(self._records) < max_records:
+                    self._records.append(r)
+
+            self._count += len(error_log)
+
+    def to_list(self):
+        """Get the kept records as dictionaries.
+
+        Returns
+        -------
+        list
+            See :any:`ErrorRecord.to_dict`.
+        """
+        return [r.to_dict() for r in self]
+
+
+if __name__ == "__main__":
+    pass
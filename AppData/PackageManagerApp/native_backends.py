@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""Native backends.
+
+In-process readers of the package managers databases. They are used to check the state of packages
+without spawning a process for each of them.
+
+Attributes
+----------
+dpkg_installed_states : tuple
+    Values of the third word of the ``Status`` field of a dpkg status database stanza that mark a
+    package as installed.
+"""
+import glob
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+
+dpkg_installed_states = (
+    "installed",
+    "triggers-awaited",
+    "triggers-pending"
+)
+
+_dpkg_fields_re = re.compile(rb"^(Package|Status): *(\S+)(?: +\S+ +(\S+))?[ \t]*$", re.MULTILINE)
+_apt_package_re = re.compile(rb"^Package: *(\S+)", re.MULTILINE)
+
+
+def _mmap_finditer(file_path, regex):
+    """Iterate over the matches of a regular expression in a memory-mapped file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a file.
+    regex : re.Pattern
+        A compiled bytes regular expression.
+
+    Yields
+    ------
+    re.Match
+        A match object.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from regex.finditer(data)
+
+
+class DpkgStatusIndex():
+    """Index of the dpkg status database.
+
+    Attributes
+    ----------
+    admindir : str
+        The dpkg administrative directory.
+    status_file : str
+        Path to the dpkg status database.
+    """
+    default_path = "/var/lib/dpkg"
+
+    def __init__(self, path=None):
+        """
+        Parameters
+        ----------
+        path : str, optional
+            The dpkg administrative directory. Useful for inspecting chroots.
+        """
+        self.admindir = path or self.default_path
+        self.status_file = os.path.join(self.admindir, "status")
+        self._index = None
+        self._fingerprint = None
+
+    def _get_fingerprint(self):
+        """Get the current state of the status database.
+
+        Returns
+        -------
+        list
+            The modification time and size of the status database.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the status database doesn't exist.
+        """
+        stat = os.stat(self.status_file)
+
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def refresh(self):
+        """Discard the parsed database if it changed since it was parsed.
+
+        Used by instances kept in memory between runs (see :any:`server.PlanServer`).
+        """
+        try:
+            if self._get_fingerprint() == self._fingerprint:
+                return
+        except OSError:
+            pass
+
+        self._index = None
+
+    def _load(self):
+        """Parse the status database into a package name to package state mapping.
+
+        Only the ``Package`` and ``Status`` fields are looked at. If a package is listed more than
+        once (one stanza per architecture), an installed state takes precedence.
+        """
+        # Taken before parsing. Changes made while parsing make the parsed database outdated.
+        self._fingerprint = self._get_fingerprint()
+        index = {}
+        states = {}
+        pkg = None
+
+        for match in _mmap_finditer(self.status_file, _dpkg_fields_re):
+            if match.group(1) == b"Package":
+                pkg = sys.intern(match.group(2).decode("utf-8", "replace"))
+            elif pkg is not None and match.group(3) is not None:
+                state = match.group(3)
+                # Status values are very few. Share the same string objects.
+                state = states.setdefault(state, state.decode("ascii", "replace"))
+
+                if index.get(pkg) not in dpkg_installed_states:
+                    index[pkg] = state
+
+                pkg = None
+
+        self._index = index
+
+    def get_state(self, pkg):
+        """Get package state.
+
+        Parameters
+        ----------
+        pkg : str
+            The name of a package.
+
+        Returns
+        -------
+        str, None
+            The package state as stored in the status database (e.g. ``installed``,
+            ``config-files``, ``not-installed``). ``None`` if the package is unknown to dpkg.
+        """
+        if self._index is None:
+            self._load()
+
+        return self._index.get(pkg.split(":", 1)[0])
+
+    def is_installed(self, pkg):
+        """Check if a package is installed.
+
+        Parameters
+        ----------
+        pkg : str
+            The name of a package.
+
+        Returns
+        -------
+        bool
+            If the package is installed.
+        """
+        return self.get_state(pkg) in dpkg_installed_states
+
+    def get_packages(self):
+        """Get installed packages.
+
+        Returns
+        -------
+        frozenset
+            The names of all installed packages.
+        """
+        if self._index is None:
+            self._load()
+
+        return frozenset(p for p, s in self._index.items() if s in dpkg_installed_states)
+
+
+class AptListsIndex():
+    """Index of the packages available on the APT software sources.
+
+    Attributes
+    ----------
+    cache_file : str, None
+        Path to the file used to store the index between runs.
+    lists_dir : str
+        The directory containing the APT ``*_Packages`` index files.
+    """
+    default_path = "/var/lib/apt/lists"
+
+    def __init__(self, path=None, cache_dir=None):
+        """
+        Parameters
+        ----------
+        path : str, optional
+            The directory containing the APT ``*_Packages`` index files.
+        cache_dir : str, optional
+            Directory in which to store the index between runs. If not set, the index isn't stored.
+        """
+        self.lists_dir = path or self.default_path
+        self.cache_file = None
+
+        if cache_dir:
+            # Each lists directory (e.g. one per chroot) gets its own stored index.
+            self.cache_file = os.path.join(cache_dir, "apt_lists_index_%s.json" % hashlib.md5(
+                os.path.abspath(self.lists_dir).encode("utf-8")).hexdigest())
+        self._packages = None
+        self._fingerprint = None
+
+    def _get_fingerprint(self):
+        """Get the current state of the index files.
+
+        Returns
+        -------
+        list
+            The path, modification time and size of each index file.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the index files directory doesn't exist.
+        """
+        if not os.path.isdir(self.lists_dir):
+            raise FileNotFoundError("APT lists directory not found: %s" % self.lists_dir)
+
+        fingerprint = []
+
+        for file_path in sorted(glob.glob(os.path.join(self.lists_dir, "*_Packages"))):
+            stat = os.stat(file_path)
+            fingerprint.append([file_path, stat.st_mtime_ns, stat.st_size])
+
+        return fingerprint
+
+    def refresh(self):
+        """Discard the loaded index if any of the index files changed since it was loaded.
+
+        Used by instances kept in memory between runs (see :any:`server.PlanServer`).
+        """
+        try:
+            if self._get_fingerprint() == self._fingerprint:
+                return
+        except OSError:
+            pass
+
+        self._packages = None
+
+    def _read_cache(self, fingerprint):
+        """Read stored index.
+
+        Parameters
+        ----------
+        fingerprint : list
+            See :any:`AptListsIndex._get_fingerprint`.
+
+        Returns
+        -------
+        frozenset, None
+            The stored package names. ``None`` if there is no stored index or if it was created
+            from index files that changed since.
+        """
+        if not self.cache_file or not os.path.isfile(self.cache_file):
+            return None
+
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("fingerprint") != fingerprint:
+            return None
+
+        return frozenset(data.get("packages", []))
+
+    def _write_cache(self, fingerprint, packages):
+        """Store index.
+
+        Parameters
+        ----------
+        fingerprint : list
+            See :any:`AptListsIndex._get_fingerprint`.
+        packages : frozenset
+            The package names to store.
+        """
+        if not self.cache_file:
+            return
+
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = self.cache_file + ".tmp"
+
+        with open(tmp_file, "w", encoding="utf-8") as cache_file:
+            json.dump({
+                "fingerprint": fingerprint,
+                "packages": sorted(packages)
+            }, cache_file)
+
+        os.replace(tmp_file, self.cache_file)
+
+    def _load(self):
+        """Extract the package names from the index files.
+
+        The stored index is used if none of the index files changed since it was created.
+        """
+        fingerprint = self._get_fingerprint()
+        packages = self._read_cache(fingerprint)
+
+        if packages is None:
+            packages = set()
+
+            for file_path, mtime, size in fingerprint:
+                packages.update(m.group(1) for m in _mmap_finditer(file_path, _apt_package_re))
+
+            packages = frozenset(p.decode("utf-8", "replace") for p in packages)
+
+            # The index is still valid if it can't be stored.
+            try:
+                self._write_cache(fingerprint, packages)
+            except OSError:
+                pass
+
+        self._packages = packages
+        self._fingerprint = fingerprint
+
+    def is_available(self, pkg):
+        """Check if a package is available on the software sources.
+
+        Parameters
+        ----------
+        pkg : str
+            The name of a package.
+
+        Returns
+        -------
+        bool
+            If the package is available.
+        """
+        if self._packages is None:
+            self._load()
+
+        return pkg.split(":", 1)[0] in self._packages
+
+    def get_packages(self):
+        """Get available packages.
+
+        Returns
+        -------
+        frozenset
+            The names of all packages available on the software sources.
+        """
+        if self._packages is None:
+            self._load()
+
+        return self._packages
+
+
+_backends = {
+    "apt_lists": AptListsIndex,
+    "dpkg_status": DpkgStatusIndex
+}
+
+
+def get_backend(definition, cache_dir=None, root=None):
+    """Get native backend.
+
+    Parameters
+    ----------
+    definition : dict
+        A native backend definition as found in an interface file.
+    cache_dir : str, optional
+        Directory in which backends that support it can store data between runs.
+    root : str, optional
+        Root directory of the system to inspect. Used to locate the database when the definition
+        doesn't specify a path.
+
+    Returns
+    -------
+    object
+        A native backend instance.
+    """
+    backend = _backends[definition["backend"]]
+    path = definition.get("path")
+
+    if path is None and root is not None:
+        path = os.path.join(root, backend.default_path.lstrip("/"))
+
+    if backend is AptListsIndex:
+        return backend(path=path, cache_dir=cache_dir)
+
+    return backend(path=path)
+
+
+if __name__ == "__main__":
+    pass
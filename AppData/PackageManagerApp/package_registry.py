@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Packages registry.
+"""
+import sys
+
+
+class PackageRecord():
+    """Package record.
+
+    Attributes
+    ----------
+    exists : bool, None
+        If the package exists in the software sources. ``None`` if not checked.
+    failed : bool
+        If a check command of the package failed (an unexpected exit status or the command
+        couldn't be executed).
+    handle : bool
+        If the package will be processed by the ``install`` or ``remove`` actions.
+    installed : bool, None
+        If the package is installed in the system. ``None`` if not checked.
+    name : str
+        The name of the package.
+    source : str
+        Path to the packages list file the package was first found in.
+    timed_out : bool
+        If a check of the package timed out.
+    """
+    __slots__ = (
+        "exists",
+        "failed",
+        "handle",
+        "installed",
+        "name",
+        "source",
+        "timed_out",
+    )
+
+    def __init__(self, name, source=""):
+        """
+        Parameters
+        ----------
+        name : str
+            The name of the package.
+        source : str, optional
+            Path to the packages list file the package was found in.
+        """
+        self.name = name
+        self.source = source
+        self.exists = None
+        self.installed = None
+        self.handle = False
+        self.timed_out = False
+        self.failed = False
+
+
+class PackageRegistry():
+    """Ordered collection of unique package records.
+
+    Packages are stored in the order they were first added.
+    """
+
+    def __init__(self):
+        self._records = []
+        self._index = {}
+        # Sources are shared by many records. Store each path only once.
+        self._sources = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def add(self, name, source=""):
+        """Add a package.
+
+        Packages already added are ignored.
+
+        Parameters
+        ----------
+        name : str
+            The name of the package.
+        source : str, optional
+            Path to the packages list file the package was found in.
+
+        Returns
+        -------
+        PackageRecord
+            The package record.
+        """
+        record = self._index.get(name)
+
+        if record is None:
+            name = sys.intern(name)
+            record = PackageRecord(name, self._sources.setdefault(source, source))
+            self._records.append(record)
+            self._index[name] = record
+
+        return record
+
+    def extend(self, names, source=""):
+        """Add several packages.
+
+        Parameters
+        ----------
+        names : list
+            The names of the packages.
+        source : str, optional
+            Path to the packages list file the packages were found in.
+        """
+        for name in names:
+            self.add(name, source)
+
+    def get(self, name):
+        """Get a package record.
+
+        Parameters
+        ----------
+        name : str
+            The name of the package.
+
+        Returns
+        -------
+        PackageRecord, None
+            The package record. ``None`` if the package wasn't added.
+        """
+        return self._index.get(name)
+
+    def names(self, **flags):
+        """Get package names.
+
+        Parameters
+        ----------
+        **flags
+            Only get the names of the packages whose record attributes are equal to the passed
+            values. E.g. ``exists=False`` or ``installed=True``.
+
+        Returns
+        -------
+        list
+            The package names in the order they were added.
+        """
+        if not flags:
+            return [r.name for r in self._records]
+
+        flags = list(flags.items())
+
+        return [r.name for r in self._records
+                if all(getattr(r, k) is v for k, v in flags)]
+
+    def set_handled(self, names):
+        """Mark packages as the ones to be processed.
+
+        Parameters
+        ----------
+        names : list
+            The names of the packages. All other packages are unmarked.
+        """
+        names = set(names)
+
+        for r in self._records:
+            r.handle = r.name in names
+
+
+if __name__ == "__main__":
+    pass
@@ -103,7 +103,7 @@ class CommandLineInterfaceSuper():
 
 
 def run_cli(flag_file="", docopt_doc="", app_name="",
-            app_version="", app_status="", cli_class=None):
+            app_version="", app_status="", cli_class=None, docopt_cache_dir=None):
     """Initialize main command line interface.
 
     Parameters
@@ -120,6 +120,9 @@ def run_cli(flag_file="", docopt_doc="", app_name="",
         Application status.
     cli_class : cli_utils.CommandLineInterfaceSuper
         An instance of ``cli_utils.CommandLineInterfaceSuper``.
+    docopt_cache_dir : str, None, optional
+        Directory in which to store the grammar parsed from ``docopt_doc``. See
+        :any:`docopt.docopt`.
 
     Raises
     ------
@@ -133,7 +136,8 @@ def run_cli(flag_file="", docopt_doc="", app_name="",
     arguments = docopt(docopt_doc, version="%s %s%s" %
                        (app_name,
                         app_version,
-                        " (%s)" % app_status if app_status else ""))
+                        " (%s)" % app_status if app_status else ""),
+                       cache_dir=docopt_cache_dir)
     cli = cli_class(arguments)
     cli.run()
 
@@ -18,6 +18,8 @@
     It will highlight in bold any text surrounded with double asterisks (e.g. **bold text**). \
     The parsing is done line by line. It should only be used to highlight words inside \
     options/commands descriptions.
+    - Added an optional cache of the parsed grammar (``cache_dir`` parameter). Building the \
+    pattern tree of a long usage text is by far the slowest part of parsing the arguments.
 
 .. warning::
     Some warnings/workarounds to bypass some known issues with docopt.
@@ -54,6 +56,9 @@
         # - unordered_arguments can have missing items.
         # - unordered_arguments cannot have items that aren't present in order_reference.
 """
+import hashlib
+import os
+import pickle
 import re
 import sys
 
@@ -556,7 +561,83 @@ class Dict(dict):
         return '{%s}' % ',\n '.join('%r: %r' % i for i in sorted(self.items()))
 
 
-def docopt(doc, argv=None, help=True, version=None, options_first=False):
+def _build_grammar(doc):
+    """Parse the usage text into a pattern tree.
+
+    Parameters
+    ----------
+    doc : str
+        Description of your command-line interface.
+
+    Returns
+    -------
+    tuple
+        The printable usage, the options and the fixed pattern tree.
+    """
+    usage = printable_usage(doc)
+    options = parse_defaults(doc)
+    pattern = parse_pattern(formal_usage(usage), options)
+    # [default] syntax for argument is disabled
+    # for a in pattern.flat(Argument):
+    #    same_name = [d for d in arguments if d.name == a.name]
+    #    if same_name:
+    #        a.value = same_name[0].value
+    pattern_options = set(pattern.flat(Option))
+    for ao in pattern.flat(AnyOptions):
+        doc_options = parse_defaults(doc)
+        ao.children = list(set(doc_options) - pattern_options)
+        # if any_options:
+        #    ao.children += [Option(o.short, o.long, o.argcount)
+        #                    for o in argv if type(o) is Option]
+    return usage, options, pattern.fix()
+
+
+def _get_grammar(doc, cache_dir=None):
+    """Get the pattern tree of a usage text.
+
+    Parameters
+    ----------
+    doc : str
+        Description of your command-line interface.
+    cache_dir : str, None, optional
+        Directory in which to store the parsed grammar. It is keyed by a hash of ``doc`` and of
+        the docopt version. If ``None``, the grammar is always built.
+
+    Returns
+    -------
+    tuple
+        See :any:`_build_grammar`.
+    """
+    if cache_dir is None:
+        return _build_grammar(doc)
+
+    key = hashlib.sha1(("%s\0%s" % (__version__, doc)).encode("utf-8")).hexdigest()
+    cache_file = os.path.join(cache_dir, "docopt_%s.pickle" % key)
+
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # Missing, partially written or created by an incompatible version of this module.
+        pass
+
+    grammar = _build_grammar(doc)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = "%s.%d.tmp" % (cache_file, os.getpid())
+
+        with open(tmp_file, "wb") as f:
+            pickle.dump(grammar, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+    return grammar
+
+
+def docopt(doc, argv=None, help=True, version=None, options_first=False, cache_dir=None):
     """Parse `argv` based on command-line interface described in `doc`.
 
     `docopt` creates your command-line interface based on its
@@ -580,6 +661,9 @@ def docopt(doc, argv=None, help=True, version=None, options_first=False):
     options_first : bool (default: False)
         Set to True to require options preceed positional arguments,
         i.e. to forbid options and positional arguments intermix.
+    cache_dir : str, None, optional
+        Directory in which to store the parsed grammar so it is built only
+        once per version of `doc`. Not stored if None.
 
     Returns
     -------
@@ -624,25 +708,11 @@ def docopt(doc, argv=None, help=True, version=None, options_first=False):
     """
     if argv is None:
         argv = sys.argv[1:]
-    DocoptExit.usage = printable_usage(doc)
-    options = parse_defaults(doc)
-    pattern = parse_pattern(formal_usage(DocoptExit.usage), options)
-    # [default] syntax for argument is disabled
-    # for a in pattern.flat(Argument):
-    #    same_name = [d for d in arguments if d.name == a.name]
-    #    if same_name:
-    #        a.value = same_name[0].value
+    DocoptExit.usage, options, pattern = _get_grammar(doc, cache_dir)
     argv = parse_argv(TokenStream(argv, DocoptExit), list(options),
                       options_first)
-    pattern_options = set(pattern.flat(Option))
-    for ao in pattern.flat(AnyOptions):
-        doc_options = parse_defaults(doc)
-        ao.children = list(set(doc_options) - pattern_options)
-        # if any_options:
-        #    ao.children += [Option(o.short, o.long, o.argcount)
-        #                    for o in argv if type(o) is Option]
     extras(help, version, argv, doc)
-    matched, left, collected = pattern.fix().match(argv)
+    matched, left, collected = pattern.match(argv)
     if matched and left == []:  # better error message if left?
         return Dict((a.name, a.value) for a in (pattern.flat() + collected))
     raise DocoptExit()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Machine readable reports.
+
+Attributes
+----------
+report_formats : tuple
+    The available report formats. ``text`` is the default human readable output of the logger.
+"""
+import json
+import threading
+
+report_formats = (
+    "text",
+    "json",
+    "ndjson"
+)
+
+
+class Reporter():
+    """Write check results and plans as JSON.
+
+    In ``ndjson`` format, one JSON object per line is written as soon as each record is available.
+    In ``json`` format, all records are written as a single JSON object when calling
+    :any:`Reporter.finish`. Records can be added from several threads.
+
+    Attributes
+    ----------
+    report_format : str
+        One of ``json`` or ``ndjson``.
+    """
+
+    def __init__(self, stream, report_format="ndjson"):
+        """
+        Parameters
+        ----------
+        stream : file object
+            Where to write the report.
+        report_format : str, optional
+            One of ``json`` or ``ndjson``.
+        """
+        self.report_format = report_format
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._records = {
+            "checks": [],
+            "plans": []
+        }
+
+    def _add(self, kind, record):
+        """Add a record.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of record (``check`` or ``plan``).
+        record : dict
+            The record.
+        """
+        with self._lock:
+            if self.report_format == "ndjson":
+                self._stream.write(json.dumps(dict(record, type=kind)) + "\n")
+                self._stream.flush()
+            else:
+                self._records[kind + "s"].append(record)
+
+    def check(self, target, pkg, action, check_passed):
+        """Add a package check result.
+
+        Parameters
+        ----------
+        target : dict
+            The host, interface and root directory the package was checked on.
+        pkg : str
+            The name of the package.
+        action : str
+            The check action.
+        check_passed : bool, None
+            If the check passed. ``None`` if the check timed out or the check command failed.
+        """
+        self._add("check", dict(target, package=pkg, action=action, passed=check_passed))
+
+    def plan(self, target, record):
+        """Add the result of the checks of an interface.
+
+        Parameters
+        ----------
+        target : dict
+            The host, interface and root directory the packages were checked on.
+        record : dict
+            The packages to handle, timings and errors.
+        """
+        self._add("plan", dict(target, **record))
+
+    def finish(self):
+        """Write the whole report in ``json`` format.
+        """
+        with self._lock:
+            if self.report_format == "json":
+                json.dump(self._records, self._stream, indent=4)
+                self._stream.write("\n")
+                self._stream.flush()
+
+
+if __name__ == "__main__":
+    pass
@@ -33,6 +33,130 @@ _interface_common_props = {
     }
 }
 
+_interface_chunk_prop = {
+    "chunk_size": {
+        "type": "integer",
+        "description": "Maximum amount of packages to pass to a single command call. The packages are always split so the command arguments don't exceed the system limit.",
+        "minimum": 1
+    }
+}
+
+_interface_final_props = {
+    **_interface_chunk_prop,
+    "bisect": {
+        "type": "boolean",
+        "description": "When the command fails for a chunk of packages, run it again in halves of the chunk until the failing packages are isolated. Confirmation is asked before each retry. It is always done in stream mode (the command doesn't read from the terminal) and when the command arguments are too long (Default: false)."
+    },
+    "abort_status": {
+        "type": "array",
+        "description": "Exit statuses of the command that mean that the user aborted it (e.g. [1] for 'apt-get', which exits with 100 on errors). The command is never run again after them. 130 is always considered an abort.",
+        "items": {
+            "type": "integer"
+        }
+    }
+}
+
+_interface_parser_props = {
+    "parser": {
+        "type": "string",
+        "description": "Name of a predefined output parser. Ignored if 'pattern' is defined.",
+        "enum": [
+            "first_word",
+            "line"
+        ]
+    },
+    "pattern": {
+        "type": "string",
+        "description": "Regular expression matched against the beginning of each output line. It must define a named group called 'pkg' that captures a package name. If it also defines a named group called 'status', its value is compared against 'passed_status'."
+    },
+    "passed_status": {
+        "type": "array",
+        "description": "List of values of the 'status' named group that mark a package as passing the check.",
+        "items": {
+            "type": "string"
+        }
+    }
+}
+
+_interface_list_fingerprint_prop = {
+    "fingerprint_paths": {
+        "type": "array",
+        "description": "Paths to files or directories (e.g. /var/lib/dpkg/status) whose modification changes the listed packages. If defined (or if the 'cache' fingerprint paths are), a planning server keeps the listed packages in memory until any of these paths change (Default: the 'cache' fingerprint paths).",
+        "items": {
+            "type": "string"
+        }
+    }
+}
+
+_interface_batch_prop = {
+    "batch": {
+        "type": "object",
+        "description": "Check many packages with a single command call. The command output is parsed line by line and each matched line marks a package as passing the check. An exit status other than 0 or the ones listed in negative_status (Default: [1]) is reported as an error and all the packages passed to that command call are left unchecked.",
+        "additionalProperties": False,
+        "properties": {
+            "chunk_size": {
+                "type": "integer",
+                "description": "Maximum amount of packages to pass to a single command call.",
+                "minimum": 1
+            },
+            **_interface_parser_props
+        }
+    }
+}
+
+_interface_timeout_props = {
+    "timeout": {
+        "type": "number",
+        "description": "Maximum amount of seconds a single command call is allowed to run. When exceeded, the command and all its child processes are killed and the checked packages are reported as timed out.",
+        "exclusiveMinimum": 0
+    },
+    "retries": {
+        "type": "integer",
+        "description": "Amount of times to call again a command that timed out (Default: 0).",
+        "minimum": 0
+    },
+    "retry_delay": {
+        "type": "number",
+        "description": "Amount of seconds to wait before the first retry. The delay is doubled after each retry (Default: 1).",
+        "minimum": 0
+    }
+}
+
+_interface_status_prop = {
+    "negative_status": {
+        "type": "array",
+        "description": "Exit statuses of the command that mean that a package didn't pass the check (e.g. [1] for 'dpkg -s' or [100] for 'apt-cache show'). Any other non-zero exit status is reported as an error and the package is left unchecked (the result is neither used nor stored). If not defined, all exit statuses greater than 0 except 126 and 127 are considered negative results. In batch mode, they are the exit statuses other than 0 that aren't a failure (Default: [1]).",
+        "items": {
+            "type": "integer"
+        }
+    }
+}
+
+_interface_native_prop = {
+    "native": {
+        "type": "object",
+        "description": "Use a built-in reader of the package manager database instead of executing a command for each package. If defined and the database can be read, it takes precedence over all other check methods.",
+        "additionalProperties": False,
+        "required": [
+            "backend"
+        ],
+        "properties": {
+            "backend": {
+                "type": "string",
+                "description": "Name of the native backend.",
+                "enum": [
+                    "apt_lists",
+                    "dpkg_status"
+                ]
+            },
+            "path": {
+                "type": "string",
+                "description": "Path to the location of the package manager database (the dpkg administrative directory for 'dpkg_status' or the APT lists directory for 'apt_lists'). Useful for inspecting chroots."
+            }
+        }
+    }
+}
+
 interface_schema = {
     "description": "Schema to validate the 'interface' property inside a UserData/interfaces/<file_name>.py file.",
     "type": "object",
@@ -48,25 +172,76 @@ interface_schema = {
             "type": "object",
             "description": "Command definition for checking if a package exist.",
             "additionalProperties": False,
-            "properties": _interface_common_props
+            "properties": {
+                **_interface_common_props,
+                **_interface_timeout_props,
+                **_interface_status_prop,
+                **_interface_batch_prop,
+                **_interface_native_prop
+            }
         },
         "installed": {
             "type": "object",
             "description": "Command definition for checking if a package i installed.",
             "additionalProperties": False,
-            "properties": _interface_common_props
+            "properties": {
+                **_interface_common_props,
+                **_interface_timeout_props,
+                **_interface_status_prop,
+                **_interface_batch_prop,
+                **_interface_native_prop
+            }
         },
         "install": {
             "type": "object",
             "description": "Command definition for installing a list of packages.",
             "additionalProperties": False,
-            "properties": _interface_common_props
+            "properties": {**_interface_common_props, **_interface_final_props}
         },
         "remove": {
             "type": "object",
             "description": "Command definition for removing a list of packages.",
             "additionalProperties": False,
-            "properties": _interface_common_props
+            "properties": {**_interface_common_props, **_interface_final_props}
+        },
+        "prefetch": {
+            "type": "object",
+            "description": "Command definition for downloading a list of packages without installing them (e.g. apt-get install --download-only). If defined, packages are downloaded in parallel chunks while the installation confirmation is asked. The command must not be interactive.",
+            "additionalProperties": False,
+            "properties": {**_interface_common_props, **_interface_chunk_prop}
+        },
+        "list_installed": {
+            "type": "object",
+            "description": "Command definition for listing all installed packages. If defined, it is used instead of the 'installed' command. Its output is parsed line by line.",
+            "additionalProperties": False,
+            "properties": {**_interface_common_props, **_interface_parser_props,
+                           **_interface_list_fingerprint_prop}
+        },
+        "list_available": {
+            "type": "object",
+            "description": "Command definition for listing all packages available on the software sources. If defined, it is used instead of the 'exists' command. Its output is parsed line by line.",
+            "additionalProperties": False,
+            "properties": {**_interface_common_props, **_interface_parser_props,
+                           **_interface_list_fingerprint_prop}
+        },
+        "cache": {
+            "type": "object",
+            "description": "Store the results of the 'exists'/'installed' checks between runs. The stored results are discarded as soon as the system packages are installed/removed with this interface.",
+            "additionalProperties": False,
+            "properties": {
+                "fingerprint_paths": {
+                    "type": "array",
+                    "description": "Paths to files or directories (e.g. /var/lib/dpkg/status, /var/lib/apt/lists) whose modification invalidates all stored results.",
+                    "items": {
+                        "type": "string"
+                    }
+                },
+                "ttl": {
+                    "type": "integer",
+                    "description": "Amount of seconds a stored result is considered valid (Default: 3600).",
+                    "minimum": 0
+                }
+            }
         }
     }
 }
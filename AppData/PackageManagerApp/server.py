@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""Planning server.
+
+A long-running process that keeps the interface definitions, the parsed packages lists, the
+package databases and the package check results in memory and answers planning requests from thin
+clients over a Unix socket. The interface definitions and the packages lists are reloaded when
+their files change. The native backends reload their databases when they change. The packages
+listed by the ``list_installed``/``list_available`` commands are kept if the commands (or the
+interface ``cache``) define fingerprint paths and are listed again when any of them change. The
+check results are kept for the interfaces that define a ``cache`` and are discarded when any of
+its fingerprint paths (the package databases) change.
+
+The protocol is a JSON object per line. Each request gets a JSON object line in response with a
+``status`` key (``ok`` or ``error``). Requests are handled one at a time.
+
+- ``{"command": "ping"}``
+- ``{"command": "shutdown"}``
+- ``{"command": "plan", "action": "install", "interfaces": [...], ...}``. The rest of the keys are
+  the ones defined in ``_plan_options``. The response contains a ``plans`` list with the same
+  records as the ``plan`` records of a machine readable report (see :any:`reports.Reporter`).
+
+Attributes
+----------
+default_socket_path : str
+    Path to the socket used when none is specified.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from . import config_files
+from .python_utils import exceptions
+
+default_socket_path = os.path.join(config_files.root_folder, "UserData", "server.sock")
+
+# Keys of a plan request passed to app_utils.PackageManagerGroup and their default values.
+_plan_options = {
+    "interfaces": [],
+    "pkgs_list_relative": [],
+    "pkgs_list_absolute": [],
+    "ignore_exists_check": False,
+    "ignore_installed_check": False,
+    "jobs": 1,
+    "roots": [],
+    "hosts": [],
+    "max_hosts": 4
+}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handle the requests of a client connection.
+    """
+
+    def handle(self):
+        """Answer each request line.
+        """
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode("utf-8"))
+
+                if not isinstance(request, dict):
+                    raise ValueError("A request must be a JSON object.")
+            except ValueError as err:
+                response = {"status": "error", "message": "Malformed request: %s" % err}
+            else:
+                response = self.server.answer(request)
+
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class PlanServer(socketserver.UnixStreamServer):
+    """Planning server.
+
+    Attributes
+    ----------
+    logger : LogSystem
+        The logger.
+    socket_path : str
+        Path to the Unix socket the server listens on.
+    """
+
+    def __init__(self, socket_path=default_socket_path, logger=None):
+        """
+        Parameters
+        ----------
+        socket_path : str, optional
+            Path to the Unix socket to listen on. A socket left by a server that is no longer
+            running is replaced.
+        logger : LogSystem
+            The logger.
+
+        Raises
+        ------
+        exceptions.ExistentLocation
+            If another server is listening on the socket.
+        """
+        self.socket_path = socket_path
+        self.logger = logger
+        # Check results storages, native backends and listed packages of all the interfaces and
+        # target systems. See app_utils.PackageManager.
+        self._cache_store = {}
+        self._listed_store = {}
+
+        if os.path.exists(socket_path):
+            try:
+                send_request({"command": "ping"}, socket_path, timeout=1)
+            except (OSError, ValueError):
+                os.remove(socket_path)
+            else:
+                raise exceptions.ExistentLocation(
+                    "A server is already listening on %s" % socket_path)
+
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        super().__init__(socket_path, _RequestHandler)
+        # The requests run package manager commands. Only the user running the server can send
+        # them.
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        """Stop listening and remove the socket.
+        """
+        super().server_close()
+
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+    def answer(self, request):
+        """Answer a request.
+
+        Parameters
+        ----------
+        request : dict
+            The request.
+
+        Returns
+        -------
+        dict
+            The response.
+        """
+        command = request.get("command")
+
+        if command == "ping":
+            return {"status": "ok"}
+        elif command == "shutdown":
+            self.logger.info("**Shutting down server...**")
+            # shutdown() waits for serve_forever() to return. It can't be called from its thread.
+            threading.Thread(target=self.shutdown).start()
+
+            return {"status": "ok"}
+        elif command == "plan":
+            return self._plan(request)
+
+        return {"status": "error", "message": "Unknown command: %s" % command}
+
+    def _plan(self, request):
+        """Answer a plan request.
+
+        Parameters
+        ----------
+        request : dict
+            The request.
+
+        Returns
+        -------
+        dict
+            The response.
+
+        Raises
+        ------
+        SystemExit
+            If the checks were interrupted. Halt execution.
+        """
+        from . import app_utils
+
+        action = request.get("action")
+
+        if action not in ("install", "remove"):
+            return {"status": "error", "message": "Unknown action: %s" % action}
+
+        options = {k: request.get(k, v) for k, v in _plan_options.items()}
+
+        if not options["interfaces"]:
+            return {"status": "error", "message": "No interfaces specified."}
+
+        self.logger.info("**Plan request:** %s %s" % (action, ", ".join(options["interfaces"])))
+        start = time.perf_counter()
+
+        try:
+            plans = app_utils.PackageManagerGroup(cache_store=self._cache_store,
+                                                  listed_store=self._listed_store,
+                                                  logger=self.logger,
+                                                  **options).plan_packages(action)
+        except SystemExit as err:
+            if isinstance(err.code, exceptions.KeyboardInterruption):
+                raise
+
+            # This application exceptions exit when they are created.
+            return {"status": "error", "message": str(err.code)}
+        except Exception as err:
+            return {"status": "error", "message": "%s: %s" % (type(err).__name__, err)}
+
+        duration = time.perf_counter() - start
+        self.logger.info("**Plan request answered in %.3f seconds.**" % duration)
+
+        return {
+            "status": "ok",
+            "plans": [dict(target, **plan) for target, plan in plans],
+            "duration": duration
+        }
+
+
+def send_request(request, socket_path=default_socket_path, timeout=None):
+    """Send a request to a planning server.
+
+    Parameters
+    ----------
+    request : dict
+        The request.
+    socket_path : str, optional
+        Path to the Unix socket the server listens on.
+    timeout : float, None, optional
+        Seconds to wait for the server. Wait forever if ``None``.
+
+    Returns
+    -------
+    dict
+        The response.
+
+    Raises
+    ------
+    OSError
+        If the server can't be reached.
+    ValueError
+        If the response is malformed.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+
+        with sock.makefile("rb") as response_file:
+            response = response_file.readline()
+
+    return json.loads(response.decode("utf-8"))
+
+
+if __name__ == "__main__":
+    pass
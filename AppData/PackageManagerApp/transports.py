@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""Transports.
+
+A transport decides where the commands of an interface are executed. The running system, a remote
+host through SSH or, for testing, a local process that pretends to run on another host.
+
+Attributes
+----------
+fake_host_env_var : str
+    Name of the environment variable set to the host name for the commands executed by a
+    :any:`FakeHostTransport`.
+"""
+import os
+import shlex
+import subprocess
+
+from .python_utils import cmd_utils
+
+fake_host_env_var = "PACKAGE_MANAGER_FAKE_HOST"
+
+_ssh_cmd = [
+    "ssh",
+    # Never ask for passwords or host key confirmations. They would block the checks.
+    "-o", "BatchMode=yes",
+    # Reuse a single connection for all the commands executed on a host.
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/package-manager-%C",
+    "-o", "ControlPersist=60"
+]
+
+# Used when the system limit for the arguments of a new process can't be obtained.
+# It is the POSIX minimum.
+_default_arg_max = 4096
+_arg_max_margin = 4096
+# sshd passes the remote command to the remote shell as a single "sh -c" argument. On Linux, a
+# single argument can't exceed MAX_ARG_STRLEN (32 pages).
+_remote_cmd_max = 131072
+
+
+class LocalTransport():
+    """Execute commands on the running system.
+
+    Attributes
+    ----------
+    failure_status : tuple
+        Exit statuses that mean that the transport itself failed to execute a command. They are
+        never taken as the exit status of the command.
+    host : str, None
+        The host the commands are executed on. ``None`` for the running system.
+    is_local : bool
+        If the commands are executed on the running system. Only then, the files of the package
+        managers databases can be read directly.
+    """
+    failure_status = ()
+    host = None
+    is_local = True
+
+    def get_cmd(self, cmd, interactive=False):
+        """Get the command that executes a command through this transport.
+
+        Parameters
+        ----------
+        cmd : list
+            The command to execute.
+        interactive : bool, optional
+            If the command needs a terminal.
+
+        Returns
+        -------
+        list
+            The command to execute locally.
+        """
+        return cmd
+
+    def get_arg_size(self, arg):
+        """Get the amount of bytes an argument takes from the arguments limit.
+
+        Parameters
+        ----------
+        arg : str
+            The argument.
+
+        Returns
+        -------
+        int
+            The argument length plus a null terminator plus a pointer.
+        """
+        return len(arg.encode()) + 1 + 8
+
+    def get_args_budget(self, cmd):
+        """Get the amount of bytes available for the arguments appended to a command.
+
+        Parameters
+        ----------
+        cmd : list
+            The command the arguments are appended to.
+
+        Returns
+        -------
+        int
+            The system limit for the arguments of a new process minus the size of the command and
+            the environment. See :any:`LocalTransport.get_arg_size`.
+        """
+        try:
+            arg_max = os.sysconf("SC_ARG_MAX")
+        except (AttributeError, ValueError, OSError):
+            arg_max = _default_arg_max
+
+        # Environment variables take the same space as arguments.
+        env_size = sum(self.get_arg_size("%s=%s" % (k, v)) for k, v in self.get_env().items())
+        cmd_size = sum(self.get_arg_size(a) for a in self.get_cmd(cmd))
+
+        return max(arg_max - env_size - cmd_size - _arg_max_margin, 1)
+
+    def get_env(self):
+        """Get the environment for the locally executed commands.
+
+        Returns
+        -------
+        dict
+            The environment variables.
+        """
+        return cmd_utils.get_environment()
+
+    def run(self, cmd, interactive=False, **kwargs):
+        """See :any:`subprocess.run`.
+
+        Parameters
+        ----------
+        cmd : list
+            The command to execute.
+        interactive : bool, optional
+            If the command needs a terminal.
+        **kwargs
+            See :any:`subprocess.run`.
+
+        Returns
+        -------
+        subprocess.CompletedProcess
+            A ``subprocess.CompletedProcess`` instance.
+        """
+        kwargs.setdefault("stdout", subprocess.PIPE)
+        kwargs.setdefault("stderr", subprocess.PIPE)
+
+        return subprocess.run(self.get_cmd(cmd, interactive), env=self.get_env(), **kwargs)
+
+    def popen(self, cmd, interactive=False, **kwargs):
+        """See :any:`subprocess.Popen`.
+
+        Parameters
+        ----------
+        cmd : list
+            The command to execute.
+        interactive : bool, optional
+            If the command needs a terminal.
+        **kwargs
+            See :any:`subprocess.Popen`.
+
+        Returns
+        -------
+        subprocess.Popen
+            A ``subprocess.Popen`` instance.
+        """
+        return subprocess.Popen(self.get_cmd(cmd, interactive), env=self.get_env(), **kwargs)
+
+
+class SSHTransport(LocalTransport):
+    """Execute commands on a remote host through SSH.
+
+    The connection to a host is shared by all commands (OpenSSH connection multiplexing).
+    """
+    # ssh exits with 255 when it fails (e.g. unreachable host, refused authentication).
+    failure_status = (255,)
+    is_local = False
+
+    def __init__(self, host):
+        """
+        Parameters
+        ----------
+        host : str
+            Destination as accepted by ssh (e.g. ``user@host``).
+        """
+        self.host = host
+
+    def get_cmd(self, cmd, interactive=False):
+        """See :any:`LocalTransport.get_cmd`.
+        """
+        # The remote shell joins the arguments. Quote them so they arrive unchanged.
+        return _ssh_cmd + (["-t"] if interactive else []) + \
+            [self.host, "--"] + [shlex.quote(a) for a in cmd]
+
+    def get_arg_size(self, arg):
+        """See :any:`LocalTransport.get_arg_size`.
+
+        Returns
+        -------
+        int
+            The quoted argument length plus the space that separates it from the next one in the
+            remote command.
+        """
+        return len(shlex.quote(arg).encode()) + 1
+
+    def get_args_budget(self, cmd):
+        """See :any:`LocalTransport.get_args_budget`.
+
+        Returns
+        -------
+        int
+            The limit for a single argument on the remote host minus the size of the command. The
+            whole remote command is passed to the remote shell as a single argument.
+        """
+        cmd_size = sum(self.get_arg_size(a) for a in cmd)
+
+        return max(_remote_cmd_max - cmd_size - _arg_max_margin, 1)
+
+
+class FakeHostTransport(LocalTransport):
+    """Execute commands locally pretending that they are executed on another host.
+
+    Used for testing. The commands can read the host name from the environment variable named as
+    defined in :any:`fake_host_env_var`.
+    """
+    is_local = False
+
+    def __init__(self, host):
+        """
+        Parameters
+        ----------
+        host : str
+            The host name.
+        """
+        self.host = host
+
+    def get_env(self):
+        """See :any:`LocalTransport.get_env`.
+        """
+        return cmd_utils.get_environment(set_vars={fake_host_env_var: self.host})
+
+
+_transports = {
+    "local": LocalTransport,
+    "ssh": SSHTransport,
+    "fake": FakeHostTransport
+}
+
+
+def get_transport(spec=None):
+    """Get transport.
+
+    Parameters
+    ----------
+    spec : str, None, optional
+        A host specification. ``local`` (or ``None``) for the running system, ``fake:<host>``
+        for a :any:`FakeHostTransport` and ``ssh:<destination>`` or just ``<destination>`` for
+        an :any:`SSHTransport`.
+
+    Returns
+    -------
+    LocalTransport
+        A transport instance.
+    """
+    if spec is None or spec == "local":
+        return LocalTransport()
+
+    name, sep, host = spec.partition(":")
+
+    if sep and name in _transports and name != "local":
+        return _transports[name](host)
+
+    return SSHTransport(spec)
+
+
+if __name__ == "__main__":
+    pass
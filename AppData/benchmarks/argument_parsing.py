@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Cold and warm argument parsing benchmark.
+
+It parses a typical ``install`` command line with the application usage text. *Cold* parsing
+builds the docopt grammar (no cache or an empty cache directory). *Warm* parsing loads the
+grammar stored by a previous run. Results are printed as JSON.
+
+Usage (from the application folder)::
+
+    python3 AppData/benchmarks/argument_parsing.py [--runs=<runs>]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
+
+from AppData.PackageManagerApp.cli import docopt_doc  # noqa
+from AppData.PackageManagerApp.python_utils.docopt import docopt  # noqa
+
+_argv = ["install", "-i", "apt", "-l", "base", "-l", "extra", "-j", "4", "--root=/mnt/a",
+         "--root=/mnt/b", "--report-format=ndjson"]
+
+
+def time_parsing(runs, get_cache_dir):
+    """Time the argument parsing.
+
+    Parameters
+    ----------
+    runs : int
+        How many times to parse the arguments.
+    get_cache_dir : function
+        Called before each run. It returns the grammar cache directory to use (or ``None``).
+
+    Returns
+    -------
+    float
+        Median milliseconds.
+    """
+    times = []
+
+    for i in range(runs):
+        cache_dir = get_cache_dir()
+        start = time.perf_counter()
+        docopt(docopt_doc, argv=_argv, cache_dir=cache_dir)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(times)
+
+
+def main():
+    """Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=10,
+                        help="Times to parse the arguments in each mode (default: %(default)s).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cold_dirs = iter(range(args.runs))
+        warm_dir = os.path.join(tmp_dir, "warm")
+        # Store the grammar for the warm runs.
+        docopt(docopt_doc, argv=_argv, cache_dir=warm_dir)
+
+        results = {
+            "runs": args.runs,
+            "no_cache_ms": round(time_parsing(args.runs, lambda: None), 2),
+            "cold_ms": round(time_parsing(
+                args.runs, lambda: os.path.join(tmp_dir, "cold%d" % next(cold_dirs))), 2),
+            "warm_ms": round(time_parsing(args.runs, lambda: warm_dir), 2)
+        }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
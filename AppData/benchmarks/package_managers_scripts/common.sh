@@ -0,0 +1,56 @@
+#!/bin/bash
+
+# Shared by the simulated package manager commands. It is sourced, not executed. Source it with an
+# argument (source common.sh ""). Without arguments, bash copies all the positional parameters of
+# the script, which takes seconds when it receives thousands of packages.
+#
+# Packages are named "pkg<number>". Their state depends on their number:
+#
+# - Packages whose number ends in 9 don't exist.
+# - Packages with an even number are installed.
+# - Packages whose number modulo 100 is lower than $BENCH_FAILURE_RATE make the commands fail.
+#
+# Environment variables:
+#
+# BENCH_LATENCY: seconds each command call waits before doing anything (default: 0).
+# BENCH_FAILURE_RATE: percentage of packages that make the commands fail (default: 0).
+# BENCH_OUTPUT_LINES: extra lines of output written for each package (default: 1).
+# BENCH_PACKAGES: amount of packages known by the list commands (default: 0).
+# BENCH_COUNTER_FILE: file to which a byte is appended on each command call. Used to count them.
+
+if [[ -n $BENCH_COUNTER_FILE ]]; then
+    printf "x" >> "$BENCH_COUNTER_FILE"
+fi
+
+if [[ ${BENCH_LATENCY:-0} != 0 ]]; then
+    sleep "$BENCH_LATENCY"
+fi
+
+# Bash builtins only. These functions are called for each package. $1 is the name of a single
+# package.
+_failure_rate=${BENCH_FAILURE_RATE:-0}
+_output_lines=${BENCH_OUTPUT_LINES:-1}
+
+is_failing(){
+    (( _failure_rate > 0 )) || return 1
+    local n=${1##*[!0-9]}
+    (( 10#${n:-0} % 100 < _failure_rate ))
+}
+
+is_available(){
+    [[ $1 != *9 ]]
+}
+
+is_installed(){
+    local n=${1##*[!0-9]}
+    (( 10#${n:-1} % 2 == 0 ))
+}
+
+# The extra output lines start with white spaces so the output parsers ignore them.
+print_output(){
+    local i
+
+    for (( i = 0; i < _output_lines; i++ )); do
+        echo "  $1: simulated output line $i"
+    done
+}
@@ -0,0 +1,17 @@
+#!/bin/bash
+
+# Simulated command to check if a single package exists in the software sources.
+#
+# $1 is the name of a single package.
+#
+# Exit status: 0 if it exists, 1 if it doesn't, 2 if the command failed.
+
+source "${0%/*}/common.sh" ""
+
+if is_failing "$1"; then
+    echo "E: $1: simulated failure" >&2
+    exit 2
+fi
+
+is_available "$1" || exit 1
+print_output "$1"
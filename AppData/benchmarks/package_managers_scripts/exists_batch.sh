@@ -0,0 +1,24 @@
+#!/bin/bash
+
+# Simulated command to check if many packages exist in the software sources.
+#
+# $@ are the names of the packages.
+#
+# The name of each existent package is written on its own line.
+# It exits with status 2 if the check of any of the packages failed.
+
+source "${0%/*}/common.sh" ""
+
+status=0
+
+for pkg in "$@"; do
+    if is_failing "$pkg"; then
+        echo "E: $pkg: simulated failure" >&2
+        status=2
+    elif is_available "$pkg"; then
+        echo "$pkg"
+        print_output "$pkg"
+    fi
+done
+
+exit $status
@@ -0,0 +1,29 @@
+#!/bin/bash
+
+# Simulated command to check if many packages are installed in a system.
+#
+# $@ are the names of the packages.
+#
+# A line with the name of each package and its status ("ii" if installed, "un" if not) is written
+# for each package.
+# It exits with status 2 if the check of any of the packages failed.
+
+source "${0%/*}/common.sh" ""
+
+status=0
+
+for pkg in "$@"; do
+    if is_failing "$pkg"; then
+        echo "E: $pkg: simulated failure" >&2
+        status=2
+        continue
+    elif is_installed "$pkg"; then
+        echo "$pkg ii"
+    else
+        echo "$pkg un"
+    fi
+
+    print_output "$pkg"
+done
+
+exit $status
@@ -0,0 +1,19 @@
+#!/bin/bash
+
+# Simulated command to list all packages available on the software sources.
+#
+# The name of each existent package out of $BENCH_PACKAGES packages is written on its own line.
+
+source "${0%/*}/common.sh" ""
+
+exec awk -v n="${BENCH_PACKAGES:-0}" -v lines="${BENCH_OUTPUT_LINES:-1}" 'BEGIN {
+    for (i = 0; i < n; i++) {
+        if (i % 10 == 9)
+            continue
+
+        print "pkg" i
+
+        for (j = 0; j < lines; j++)
+            print "  pkg" i ": simulated output line " j
+    }
+}'
@@ -0,0 +1,17 @@
+#!/bin/bash
+
+# Simulated command to list all installed packages.
+#
+# The name and status ("ii") of each installed package out of $BENCH_PACKAGES packages is written
+# on its own line.
+
+source "${0%/*}/common.sh" ""
+
+exec awk -v n="${BENCH_PACKAGES:-0}" -v lines="${BENCH_OUTPUT_LINES:-1}" 'BEGIN {
+    for (i = 0; i < n; i += 2) {
+        print "pkg" i " ii"
+
+        for (j = 0; j < lines; j++)
+            print "  pkg" i ": simulated output line " j
+    }
+}'
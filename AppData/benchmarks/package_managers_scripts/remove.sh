@@ -0,0 +1,22 @@
+#!/bin/bash
+
+# Simulated command to remove packages in bulk.
+#
+# $@ are the names of the packages.
+#
+# Exit status: 100 if any of the packages made the command fail.
+
+source "${0%/*}/common.sh" ""
+
+status=0
+
+for pkg in "$@"; do
+    if is_failing "$pkg"; then
+        echo "E: $pkg: simulated failure" >&2
+        status=100
+    fi
+
+    print_output "$pkg"
+done
+
+exit $status
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Startup benchmark of the commands executed by the Bash completions.
+
+It runs ``app.py print_interfaces`` and ``app.py print_packages_lists`` with ``python -X importtime``
+and fails (exit status 1) if any of them imports a module that isn't needed to list configuration
+files (they must only import **config_files**) or if their startup time exceeds the time it takes
+to start a bare interpreter by more than a budget.
+The commands run in a temporary application folder with a few configuration files.
+
+Usage (from the application folder)::
+
+    python3 AppData/benchmarks/startup.py [--runs=<runs>] [--budget=<milliseconds>]
+
+Attributes
+----------
+forbidden_modules : tuple
+    Modules that the completion commands must not import.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+forbidden_modules = (
+    "AppData.PackageManagerApp.app_utils",
+    "AppData.PackageManagerApp.cli",
+    "AppData.PackageManagerApp.reports",
+    "AppData.PackageManagerApp.python_utils",
+    "json",
+    "jsonschema",
+    "logging",
+    "pickle",
+)
+
+_root_folder = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+_app_file = os.path.join(_root_folder, "app.py")
+_commands = ("print_interfaces", "print_packages_lists")
+# The application refuses to run from a folder without it. See config_files.flag_file.
+_flag_file = ".package-manager.flag"
+# Configuration files created in the temporary application folder.
+_config_files = ("interfaces/example.py", "packages_lists/example.txt",
+                 "packages_lists/example.yaml")
+
+
+def create_app_folder(work_dir):
+    """Create the flag file, folders and configuration files read by the completion commands.
+
+    Parameters
+    ----------
+    work_dir : str
+        The application folder.
+    """
+    for d in ("interfaces", "packages_lists", "cache"):
+        os.makedirs(os.path.join(work_dir, "UserData", d))
+
+    for f in _config_files:
+        open(os.path.join(work_dir, "UserData", f), "w").close()
+
+    open(os.path.join(work_dir, _flag_file), "w").close()
+
+
+def get_imported_modules(command, work_dir):
+    """Get the modules imported by an application command.
+
+    Parameters
+    ----------
+    command : str
+        The application command.
+    work_dir : str
+        The application folder.
+
+    Returns
+    -------
+    list
+        The imported modules as reported by ``python -X importtime``.
+    """
+    p = subprocess.run([sys.executable, "-X", "importtime", _app_file, command],
+                       cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                       universal_newlines=True, check=True)
+
+    return [line.rsplit("|", 1)[1].strip() for line in p.stderr.splitlines()
+            if line.startswith("import time:") and "|" in line]
+
+
+def get_wall_time(cmd, runs, work_dir):
+    """Get the median wall time of a command.
+
+    Parameters
+    ----------
+    cmd : list
+        The command to execute.
+    runs : int
+        How many times to execute the command.
+    work_dir : str
+        The working directory of the command.
+
+    Returns
+    -------
+    float
+        Milliseconds.
+    """
+    times = []
+
+    for i in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=work_dir, stdout=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(times)
+
+
+def main():
+    """Run the benchmark.
+
+    Returns
+    -------
+    int
+        Exit status. ``1`` if the startup of any command regressed.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=10,
+                        help="Executions of each command to measure (default: %(default)s).")
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="Milliseconds allowed on top of the interpreter startup time "
+                        "(default: %(default)s).")
+    args = parser.parse_args()
+
+    results = {"baseline_ms": None, "budget_ms": args.budget, "commands": {}}
+    failed = False
+
+    with tempfile.TemporaryDirectory(prefix="package-manager-benchmark-") as work_dir:
+        create_app_folder(work_dir)
+        baseline = get_wall_time([sys.executable, "-c", "pass"], args.runs, work_dir)
+        results["baseline_ms"] = round(baseline, 1)
+
+        for command in _commands:
+            imported = get_imported_modules(command, work_dir)
+            forbidden = sorted(m for m in imported if m.startswith(forbidden_modules))
+            wall_time = get_wall_time([sys.executable, _app_file, command], args.runs, work_dir)
+            over_budget = wall_time - baseline > args.budget
+            failed = failed or bool(forbidden) or over_budget
+            results["commands"][command] = {
+                "wall_time_ms": round(wall_time, 1),
+                "imported_modules": len(imported),
+                "forbidden_imports": forbidden,
+                "over_budget": over_budget
+            }
+
+    results["passed"] = not failed
+    print(json.dumps(results, indent=4))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
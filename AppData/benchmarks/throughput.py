@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Package manager throughput benchmark.
+
+It drives :any:`app_utils.PackageManager` with the simulated package manager commands found in
+**AppData/benchmarks/package_managers_scripts** (see **common.sh** for the simulated packages
+states and the settings they read from the environment), so no real distribution is needed.
+
+Scenarios:
+
+- ``load``: load a **.txt** packages list (see :any:`app_utils.load_packages_lists`).
+- ``checks``: check each package with its own command call (``PackageManager._filter_packages``).
+- ``checks_batch``: check the packages with the batch mode of the check commands.
+- ``checks_list``: check the packages with the ``list_available``/``list_installed`` commands.
+- ``checks_native``: check the packages with the ``apt_lists``/``dpkg_status`` native backends
+  (see :any:`native_backends`). The APT lists and the dpkg status database are generated with the
+  same packages states as the simulated commands (``--database-packages`` stanzas, at least as
+  many as the checked packages). Comparable to ``checks``, the per-package command calls.
+- ``final_action``: install all packages (``PackageManager._perform_final_action``).
+
+Each scenario and amount of packages runs in its own process in a temporary application folder.
+The results (wall time in seconds, simulated command calls and peak resident set size in KiB of
+the process) are printed as JSON with sorted keys so results of different commits can be diffed.
+
+Usage (from the application folder)::
+
+    python3 AppData/benchmarks/throughput.py [--sizes=<sizes>] [--scenarios=<scenarios>]
+        [--jobs=<jobs>] [--latency=<seconds>] [--failure-rate=<percentage>]
+        [--output-lines=<lines>] [--database-packages=<packages>] [--output=<file>]
+
+Attributes
+----------
+format_version : int
+    Version of the results format. Increased when results of different versions can't be compared.
+scenarios : tuple
+    The available scenarios.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+format_version = 1
+scenarios = (
+    "load",
+    "checks",
+    "checks_batch",
+    "checks_list",
+    "checks_native",
+    "final_action"
+)
+
+_root_folder = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+_scripts_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "package_managers_scripts")
+_default_sizes = "100,1000,10000,100000"
+_interface_name = "bench"
+_batch_pattern = r"(?P<pkg>\S+) (?P<status>\S+)"
+_default_database_packages = 50000
+
+
+def _script(name):
+    """Get the path to a simulated command.
+
+    Parameters
+    ----------
+    name : str
+        File name (no extension) of the script.
+
+    Returns
+    -------
+    str
+        The path to the script.
+    """
+    return os.path.join(_scripts_dir, name + ".sh")
+
+
+def write_databases(work_dir, size):
+    """Generate the APT lists and the dpkg status database read by the native backends.
+
+    The packages states are the same as the ones of the simulated commands (see **common.sh**).
+
+    Parameters
+    ----------
+    work_dir : str
+        Directory in which to create the **apt_lists** and **dpkg** directories.
+    size : int
+        Amount of packages (and of dpkg status database stanzas).
+    """
+    os.makedirs(os.path.join(work_dir, "apt_lists"))
+    os.makedirs(os.path.join(work_dir, "dpkg"))
+    lists_file = os.path.join(work_dir, "apt_lists",
+                              "deb.example.org_dists_stable_main_binary-amd64_Packages")
+
+    with open(lists_file, "w", encoding="utf-8") as apt_f, \
+            open(os.path.join(work_dir, "dpkg", "status"), "w", encoding="utf-8") as dpkg_f:
+        for i in range(size):
+            # Packages whose number ends in 9 don't exist.
+            if i % 10 != 9:
+                apt_f.write("Package: pkg%d\nArchitecture: amd64\nVersion: 1.0-%d\n"
+                            "Filename: pool/main/p/pkg%d_1.0-%d_amd64.deb\n"
+                            "Description: Simulated package %d\n\n" % (i, i, i, i, i))
+
+            # Packages with an even number are installed.
+            dpkg_f.write("Package: pkg%d\nStatus: %s\nPriority: optional\nArchitecture: amd64\n"
+                         "Version: 1.0-%d\nDescription: Simulated package %d\n\n" % (
+                             i, "install ok installed" if i % 2 == 0 else
+                             "deinstall ok config-files", i, i))
+
+
+def get_interface(scenario, work_dir):
+    """Get the interface definition used by a scenario.
+
+    Parameters
+    ----------
+    scenario : str
+        The scenario.
+    work_dir : str
+        The application folder. The databases of the native backends are located in it.
+
+    Returns
+    -------
+    dict
+        The interface definition.
+    """
+    interface = {
+        "exists": {"cmd": _script("exists"), "negative_status": [1]},
+        "installed": {"cmd": _script("is_installed"), "negative_status": [1]},
+        "install": {"cmd": _script("install")},
+        "remove": {"cmd": _script("remove")}
+    }
+
+    if scenario == "checks_batch":
+        interface["exists"] = {"cmd": _script("exists_batch"), "batch": {"parser": "first_word"}}
+        interface["installed"] = {"cmd": _script("is_installed_batch"),
+                                  "batch": {"pattern": _batch_pattern, "passed_status": ["ii"]}}
+    elif scenario == "checks_list":
+        interface["list_available"] = {"cmd": _script("list_available"), "parser": "first_word"}
+        interface["list_installed"] = {"cmd": _script("list_installed"),
+                                       "pattern": _batch_pattern, "passed_status": ["ii"]}
+    elif scenario == "checks_native":
+        interface["exists"]["native"] = {"backend": "apt_lists",
+                                         "path": os.path.join(work_dir, "apt_lists")}
+        interface["installed"]["native"] = {"backend": "dpkg_status",
+                                            "path": os.path.join(work_dir, "dpkg")}
+
+    return interface
+
+
+def run_scenario(scenario, size, jobs, database_packages, work_dir):
+    """Run a scenario in this process.
+
+    Parameters
+    ----------
+    scenario : str
+        The scenario.
+    size : int
+        Amount of packages.
+    jobs : int
+        Maximum number of package checks to run concurrently.
+    database_packages : int
+        Amount of packages in the databases read by the native backends.
+    work_dir : str
+        An application folder. The working directory is changed to it.
+
+    Returns
+    -------
+    dict
+        The measurements.
+    """
+    # The application folder is the working directory at import time.
+    os.chdir(work_dir)
+    sys.path.insert(0, _root_folder)
+
+    from AppData.PackageManagerApp import app_utils
+    from AppData.PackageManagerApp.python_utils import log_system
+
+    # Imported on first use by app_utils. Keep the import time out of the measurements.
+    for module in ("json_schema_utils", "prompts", "tqdm"):
+        importlib.import_module("AppData.PackageManagerApp.python_utils." + module)
+
+    logger = log_system.LogSystem(os.path.join(work_dir, "benchmark.log"), verbose=False)
+    pkgs = ["pkg%d" % i for i in range(size)]
+    pkgs_path = os.path.join(work_dir, "UserData", "packages_lists", "bench.txt")
+
+    with open(pkgs_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(pkgs) + "\n")
+
+    if scenario == "checks_native":
+        write_databases(work_dir, max(size, database_packages))
+
+    counter_file = os.environ["BENCH_COUNTER_FILE"]
+    open(counter_file, "w").close()
+    errors = 0
+
+    if scenario == "load":
+        start = time.perf_counter()
+        routed, ignored, load_errors = app_utils.load_packages_lists(
+            ["bench"], [], [_interface_name], logger)
+        wall_time = time.perf_counter() - start
+        errors = len(load_errors)
+    else:
+        manager = app_utils.PackageManager(interface=_interface_name,
+                                           pkgs_lists=[(pkgs_path, pkgs)],
+                                           jobs=jobs,
+                                           use_cache=False,
+                                           definition=get_interface(scenario, work_dir),
+                                           logger=logger)
+        # Discard the command calls made while setting up the manager.
+        open(counter_file, "w").close()
+        start = time.perf_counter()
+
+        if scenario == "final_action":
+            manager.pkgs_to_handle = manager.packages
+            manager._perform_final_action("install")
+        else:
+            manager._filter_packages("install")
+
+        wall_time = time.perf_counter() - start
+        errors = len(manager.errors)
+
+    return {
+        "scenario": scenario,
+        "packages": size,
+        "wall_time": round(wall_time, 4),
+        "forks": os.path.getsize(counter_file),
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "errors": errors
+    }
+
+
+def measure(scenario, size, args):
+    """Run a scenario in its own process.
+
+    Parameters
+    ----------
+    scenario : str
+        The scenario.
+    size : int
+        Amount of packages.
+    args : argparse.Namespace
+        The benchmark settings.
+
+    Returns
+    -------
+    dict
+        See :any:`run_scenario`.
+    """
+    with tempfile.TemporaryDirectory(prefix="package-manager-benchmark-") as work_dir:
+        for d in ("interfaces", "packages_lists", "cache", "journals", "logs"):
+            os.makedirs(os.path.join(work_dir, "UserData", d))
+
+        result_file = os.path.join(work_dir, "result.json")
+        env = dict(os.environ,
+                   BENCH_LATENCY=str(args.latency),
+                   BENCH_FAILURE_RATE=str(args.failure_rate),
+                   BENCH_OUTPUT_LINES=str(args.output_lines),
+                   BENCH_PACKAGES=str(size),
+                   BENCH_COUNTER_FILE=os.path.join(work_dir, "calls"))
+        p = subprocess.run([sys.executable, os.path.abspath(__file__),
+                            "--child=%s:%d:%s" % (scenario, size, result_file),
+                            "--jobs=%d" % args.jobs,
+                            "--database-packages=%d" % args.database_packages],
+                           env=env,
+                           # The confirmation of the final action.
+                           input=b"y\n",
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE)
+
+        if p.returncode != 0:
+            raise RuntimeError("The %s scenario with %d packages failed:\n%s" % (
+                scenario, size, p.stderr.decode("utf-8", "replace")[-4096:]))
+
+        with open(result_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def get_commit():
+    """Get the checked out commit of the application repository.
+
+    Returns
+    -------
+    str, None
+        The commit hash. ``None`` if it can't be obtained.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=_root_folder,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              universal_newlines=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default=_default_sizes,
+                        help="Comma separated amounts of packages (default: %(default)s).")
+    parser.add_argument("--scenarios", default=",".join(scenarios),
+                        help="Comma separated scenarios (default: %(default)s).")
+    parser.add_argument("--jobs", type=int, default=8,
+                        help="Maximum number of package checks to run concurrently "
+                        "(default: %(default)s).")
+    parser.add_argument("--latency", type=float, default=0,
+                        help="Seconds each simulated command call waits (default: %(default)s).")
+    parser.add_argument("--failure-rate", type=int, default=0,
+                        help="Percentage of packages that make the simulated commands fail "
+                        "(default: %(default)s).")
+    parser.add_argument("--output-lines", type=int, default=1,
+                        help="Extra output lines of the simulated commands for each package "
+                        "(default: %(default)s).")
+    parser.add_argument("--database-packages", type=int, default=_default_database_packages,
+                        help="Packages in the databases generated for the checks_native scenario. "
+                        "Never less than the checked packages (default: %(default)s).")
+    parser.add_argument("--output", help="File in which to write the results. Standard output "
+                        "if not set.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        scenario, size, result_file = args.child.split(":", 2)
+        result = run_scenario(scenario, int(size), args.jobs, args.database_packages,
+                              os.path.dirname(result_file))
+
+        with open(result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+
+        return 0
+
+    selected = args.scenarios.split(",")
+    unknown = set(selected) - set(scenarios)
+
+    if unknown:
+        parser.error("Unknown scenarios: %s" % ", ".join(sorted(unknown)))
+
+    results = {
+        "format_version": format_version,
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "settings": {
+            "jobs": args.jobs,
+            "latency": args.latency,
+            "failure_rate": args.failure_rate,
+            "output_lines": args.output_lines,
+            "database_packages": args.database_packages
+        },
+        "results": []
+    }
+
+    for scenario in selected:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print("Running %s with %d packages..." % (scenario, size), file=sys.stderr)
+            results["results"].append(measure(scenario, size, args))
+
+    output = json.dumps(results, indent=4, sort_keys=True) + "\n"
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
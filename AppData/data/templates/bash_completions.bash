@@ -9,11 +9,31 @@ _decide_nospace_{current_date}(){
         type "compopt" &> /dev/null && compopt -o nospace
     fi
 } &&
+_read_completion_index_{current_date}(){
+    # The index is written by the application. It is outdated if any of the configuration files
+    # directories is newer than the index. Then, fall back to the application.
+    local app_folder="{full_path_to_app_folder}" file_type names
+    local index="${app_folder}/UserData/cache/completion_index"
+
+    [[ -f $index && ! $app_folder/UserData/interfaces -nt $index &&
+        ! $app_folder/UserData/packages_lists -nt $index ]] || return 1
+
+    while read -r file_type names; do
+        if [[ $file_type == "${1}" ]]; then
+            echo $names
+            return 0
+        fi
+    done < "$index"
+
+    return 1
+} &&
 _get_packages_lists_{current_date}(){
-    echo $(cd {full_path_to_app_folder}; ./app.py print_packages_lists)
+    _read_completion_index_{current_date} packages_lists ||
+        echo $(cd {full_path_to_app_folder}; ./app.py print_packages_lists)
 } &&
 _get_interfaces_{current_date}(){
-    echo $(cd {full_path_to_app_folder}; ./app.py print_interfaces)
+    _read_completion_index_{current_date} interfaces ||
+        echo $(cd {full_path_to_app_folder}; ./app.py print_interfaces)
 } &&
 __package_manager_cli_{current_date}(){
     local cur prev cmd packages_lists interfaces
@@ -60,6 +80,18 @@ __package_manager_cli_{current_date}(){
                 COMPREPLY=( $( compgen -W "${interfaces[*]}" -- ${cur}) )
                 return 0
                 ;;
+            "--root")
+                COMPREPLY=( $( compgen -d -- ${cur}) )
+                return 0
+                ;;
+            "--socket")
+                COMPREPLY=( $( compgen -f -- ${cur}) )
+                return 0
+                ;;
+            "--report-format")
+                COMPREPLY=( $( compgen -W "text json ndjson" -- ${cur}) )
+                return 0
+                ;;
         esac
 
         return 0
@@ -67,7 +99,7 @@ __package_manager_cli_{current_date}(){
 
     # Completion of commands and "first level options.
     if [[ $COMP_CWORD == 1 ]]; then
-        COMPREPLY=( $(compgen -W "install remove generate -h --help --manual --version" -- "${cur}") )
+        COMPREPLY=( $(compgen -W "install remove plan serve generate -h --help --manual --version" -- "${cur}") )
         return 0
     fi
 
@@ -77,7 +109,22 @@ __package_manager_cli_{current_date}(){
     case $cmd in
     "install"|"remove")
         COMPREPLY=( $(compgen -W "-r --report -l --list-relative= -L --list-absolute= \
--i --interface= --ignore-exists-check --ignore-installed-check" -- "${cur}") )
+-i --interface= --ignore-exists-check --ignore-installed-check -j --jobs= \
+--no-cache --refresh-cache --stream --resume --root= --host= --max-hosts= --report-format=" -- "${cur}") )
+        _decide_nospace_{current_date} ${COMPREPLY[0]}
+        ;;
+    "plan")
+        if [[ $COMP_CWORD == 2 ]]; then
+            COMPREPLY=( $(compgen -W "install remove" -- "${cur}") )
+        else
+            COMPREPLY=( $(compgen -W "-l --list-relative= -L --list-absolute= -i --interface= \
+--ignore-exists-check --ignore-installed-check -j --jobs= --root= --host= --max-hosts= \
+--socket=" -- "${cur}") )
+            _decide_nospace_{current_date} ${COMPREPLY[0]}
+        fi
+        ;;
+    "serve")
+        COMPREPLY=( $(compgen -W "--socket=" -- "${cur}") )
         _decide_nospace_{current_date} ${COMPREPLY[0]}
         ;;
     "generate")
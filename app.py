@@ -2,7 +2,12 @@
 # -*- coding: utf-8 -*-
 import sys
 
-from AppData.PackageManagerApp.cli import main
+from AppData.PackageManagerApp import config_files
 
 if __name__ == "__main__":
-    sys.exit(main())
+    # The commands executed by the Bash completions on every TAB press skip the rest of the
+    # application imports.
+    if not config_files.run_completion_command(sys.argv):
+        from AppData.PackageManagerApp.cli import main
+
+        sys.exit(main())